@@ -10,6 +10,88 @@ VIDEO_SOURCE = -1
 #VIDEO_SOURCE = "assets/colour.mp4"
 FRAME_WIDTH = 640
 FRAME_HEIGHT = 480
+# Jumlah slot ring buffer frame (dibagi ke semua viewer /video_feed)
+FRAME_BUFFER_SIZE = 4
+# Buffer frame cadangan di luar ring (frame yang masih dipegang AI/encoder).
+# Jika semua terpakai pool menambah buffer (lihat "grown" di /video_feed/stats)
+FRAME_POOL_EXTRA = 4
+# Kualitas JPEG stream (di-encode sekali per frame untuk semua viewer)
+JPEG_QUALITY = 60
+
+# --- AI SETTINGS ---
+# Batas atas kecepatan inferensi (thread AI terpisah dari stream)
+AI_MAX_FPS = 15
+# Scheduler adaptif: AI infer sesering mungkin, mundur hanya jika merebut CPU
+# AI_CPU_BUDGET = fraksi waktu 1 core untuk AI (1.0 = infer back-to-back)
+AI_CPU_BUDGET = 1.0
+# Biaya capture/encode per frame > baseline * AI_CONTENTION = CPU direbut AI -> backoff
+AI_CONTENTION = 1.5
+# Frame yang dilewati: error tracking diekstrapolasi dari gerak target (maks detik)
+AI_EXTRAPOLATE = True
+AI_EXTRAPOLATE_MAX = 0.3
+
+# --- TFLITE (OBJECT DETECTION) ---
+# Registry model SSD. Hanya varian uint8 yang ikut di assets/; int8 & float harus
+# ditambahkan sendiri. TFLITE_MODEL yang file-nya tidak ada -> fallback saat boot,
+# tapi AIProcessor.select_model() menolak (error) varian tanpa file.
+# Pilih yang tercepat di CPU ini dengan: python test/bench_tflite.py
+TFLITE_MODELS = {
+    "ssd_mobilenet_v2_uint8": "assets/ssd_mobilenet_v2.tflite",        # Bawaan (kuantisasi uint8)
+    "ssd_mobilenet_v2_int8": "assets/ssd_mobilenet_v2_int8.tflite",    # Kuantisasi int8 penuh
+    "ssd_mobilenet_v2_float": "assets/ssd_mobilenet_v2_float.tflite",  # Float32 (referensi akurasi)
+}
+TFLITE_MODEL = "ssd_mobilenet_v2_uint8"
+# Thread per interpreter. Dibatasi otomatis agar TFLITE_NUM_THREADS x AI_WORKERS <= jumlah core
+TFLITE_NUM_THREADS = 4   # Pi 4 = 4 core; None = default TFLite
+TFLITE_XNNPACK = True    # False = op resolver tanpa delegate default (XNNPACK mati)
+
+# Backend AI (TFLite/MediaPipe/pyzbar) dimuat saat mode dipilih pertama kali.
+# Mode di sini dimuat di latar setelah server siap, mis. ["object_detection"]
+AI_PREFETCH = []
+# Inferensi dummy (frame sintetis) saat backend dimuat, agar frame pertama tidak tersendat
+AI_WARMUP_RUNS = 2
+
+# --- METRICS (latensi per tahap, GET /metrics/latency) ---
+METRICS_ENABLED = True
+METRICS_WINDOW = 512  # Sampel terakhir per span untuk p50/p95/p99
+TRACE_SIZE = 256      # Jejak glass-to-motor terakhir (GET /metrics/trace)
+# Hasil AI lebih tua dari ini (detik sejak capture) dianggap basi oleh loop kontrol
+AI_MAX_RESULT_AGE = 0.5
+
+# --- TABEL WARNA (HSV OpenCV: H 0-180, S/V 0-255) ---
+# (label, (h_min, s_min, v_min), (h_max, s_max, v_max), warna BGR kotak overlay)
+# Dikompilasi sekali jadi lookup table saat AIProcessor dibuat.
+# Satu label boleh punya beberapa rentang (contoh: merah di ujung bawah & atas Hue).
+COLOR_TABLE = [
+    ("red",    (0, 160, 100),   (10, 255, 255),  (0, 0, 255)),
+    ("red",    (170, 160, 100), (180, 255, 255), (0, 0, 255)),
+    ("blue",   (110, 180, 60),  (130, 255, 255), (255, 0, 0)),
+    ("green",  (40, 70, 70),    (80, 255, 255),  (0, 255, 0)),
+    ("yellow", (20, 100, 100),  (35, 255, 255),  (0, 255, 255)),
+]
+COLOR_MIN_AREA = 800  # Luas kontur minimum (piksel) agar dianggap objek
+
+# --- ROI TRACKING (mode tracking / follow) ---
+# Cari target hanya di jendela sekitar box terakhir (ukuran box x ROI_EXPAND)
+ROI_EXPAND = 2.0
+ROI_MIN_SIZE = 120    # Sisi jendela minimum (piksel)
+ROI_MAX_MISSES = 5    # Gagal berturut-turut sebelum kembali cari full frame
+
+# --- HYBRID DETECT-THEN-TRACK (wajah & objek) ---
+# Detektor mahal tiap N frame, tracker OpenCV murah di antaranya
+TRACKER_TYPE = "KCF"          # "KCF", "MOSSE" atau "CSRT" (butuh opencv-contrib)
+TRACKER_REDETECT_EVERY = 10
+TRACKER_MAX_SCALE = 2.0       # Luas box berubah > 2x dari saat deteksi = tracker goyah
+# Jumlah worker paralel untuk mode berat (1 = serial seperti biasa).
+# Tiap worker memuat interpreter/graph sendiri (RAM naik per worker).
+# Naikkan AI_MAX_FPS juga jika ingin FPS deteksi naik sesuai jumlah core.
+AI_WORKERS = 1
+AI_POOL_MODES = ("object_detection", "face_detection", "gesture_recognition")
+# AI di proses terpisah (GIL sendiri): inferensi berat tidak menahan loop motor/WebSocket.
+# Frame lewat shared memory (AI_PROCESS_SLOTS slot), AI_WORKERS diabaikan jika aktif.
+AI_OUT_OF_PROCESS = False
+AI_PROCESS_SLOTS = 3          # 1 diproses + antrian (anak selalu ambil frame terbaru)
+AI_PROCESS_NICE = 5           # Prioritas proses AI lebih rendah dari proses utama
 
 # --- MOTOR SETTINGS (FINAL CONFIGURATION) ---
 
@@ -25,6 +107,9 @@ PIN_FR_BWD = 25
 PIN_RR_FWD = 5
 PIN_RR_BWD = 6
 
+# Rate tulis motor dari channel perintah joystick (setpoint terakhir saja)
+MOTOR_RATE_HZ = 50
+
 # --- EXTRAS (SERVO & BUZZER) ---
 PIN_SERVO_PAN = 12   # Servo Geleng (Kiri-Kanan)
 PIN_SERVO_TILT = 13  # Servo Angguk (Atas-Bawah)
@@ -34,6 +119,13 @@ PIN_BUZZER = 16      # Buzzer Aktif
 PIN_HCSR_TRIG = 26
 PIN_HCSR_ECHO = 20
 
+# Frekuensi thread sampling sensor (jarak, line, near/clap)
+SENSOR_RATE_HZ = 25
+
+# /ws/telemetry: max kiriman per detik & interval snapshot penuh (keyframe)
+TELEMETRY_RATE_HZ = 10
+TELEMETRY_KEYFRAME_S = 5.0
+
 # --- (BFD-1000 / 5 Channel IR) ---
 # Urutan: Kiri Jauh (LL), Kiri (L), Tengah (M), Kanan (R), Kanan Jauh (RR)
 PIN_LINE_LL = 4
@@ -44,6 +136,10 @@ PIN_LINE_RR = 21
 # Set ke 0 atau None jika tidak ingin dipakai
 PIN_BFD_NEAR = 11  # Sensor Proximity (IR Depan)
 PIN_BFD_CLAP = 19  # Sensor Tabrak (Switch Fisik)
+# Latch emergency stop per sensor (edge terpicu -> semua motor stop sampai clear).
+# Matikan jika sensor tidak terpasang / sering palsu. Lepas manual: POST /estop/release
+ESTOP_NEAR = True
+ESTOP_CLAP = True
 
 
 PIN_LED_R = 7   # Red
@@ -6,27 +6,47 @@ import json
 import asyncio
 import math
 import time 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from modules.loader import STARTUP # Dimuat paling awal: t0 laporan startup
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Request
 from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from config import HOST, PORT
+from config import HOST, PORT, TELEMETRY_RATE_HZ, TELEMETRY_KEYFRAME_S, AI_PREFETCH, AI_MAX_RESULT_AGE
 from modules.motor import MotorDriver
 from modules.camera import VideoStreamer
 from modules.extras import ExtraDrivers
 from modules.sensors import SensorManager
 from modules.config_loader import cfg_mgr
+from modules.notify import AsyncNotifier, LoopWaker
+from modules.telemetry import StateRegistry, DeltaEncoder
+from modules.metrics import LATENCY, TRACE
+from modules import protocol
 
 os.environ["OPENCV_LOG_LEVEL"] = "FATAL"
 os.environ["TF_CPP_MIN_LOG_LEVEL"] = "3"
+STARTUP.mark("imports")
 
 app = FastAPI()
 app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
 
 robot_motor = MotorDriver(simulation=False) 
 robot_cam = VideoStreamer()
+robot_cam.start() # Capture + AI jalan di thread sendiri, tidak tergantung viewer
 robot_extras = ExtraDrivers()
-robot_sensors = SensorManager()
+# Notifier sensor dibuat sekali: tetap sama walau SensorManager diganti reload_hardware()
+sensor_notifier = AsyncNotifier()
+robot_sensors = SensorManager(notifier=sensor_notifier)
+robot_sensors.start() # Sampling sensor di thread sendiri, loop kontrol baca snapshot
+robot_sensors.attach_emergency_stop(robot_motor) # Near/Clap -> stop motor via interrupt
 CURRENT_CONTROLLER = "none"
+robot_state = StateRegistry() # State internal loop kontrol (untuk /ws/telemetry)
+STARTUP.mark("hardware")
+
+@app.on_event("startup")
+async def on_startup():
+    STARTUP.mark("server_ready")
+    print(STARTUP.summary())
+    # Model AI dimuat lazy; mode di AI_PREFETCH dipanaskan di latar setelah port siap
+    if AI_PREFETCH: robot_cam.ai.prefetch(*AI_PREFETCH)
 
 # --- HELPER: Mengatur Mode & Kirim Feedback ---
 async def handle_ai_switch(websocket, payload):
@@ -34,10 +54,33 @@ async def handle_ai_switch(websocket, payload):
         mode = payload.get("mode", "off")
         robot_cam.ai.set_mode(mode) # Ganti mode di ai.py
         # Feedback ke Web
-        await websocket.send_text(json.dumps({"status": "active", "mode": mode}))
+        await send_mode_status(websocket, mode, mode)
         return True
     return False
 
+# Referensi task wait_hot yang masih jalan: task tanpa referensi bisa di-GC
+# di tengah await dan notifikasi "active" hilang diam-diam
+_status_tasks = set()
+
+async def send_mode_status(websocket, ai_mode, label):
+    """
+    Kirim "active" jika model mode ini sudah panas. Jika masih dimuat/warm-up,
+    kirim "warming" dulu lalu "active" saat siap (ditunggu di task, loop tidak diblok).
+    """
+    if robot_cam.ai.is_ready(ai_mode):
+        await websocket.send_text(json.dumps({"status": "active", "mode": label}))
+        return
+    await websocket.send_text(json.dumps({"status": "warming", "mode": label}))
+
+    async def wait_hot():
+        ok = await asyncio.to_thread(robot_cam.ai.wait_ready, ai_mode, 30.0)
+        if robot_cam.ai.mode != ai_mode: return # Sudah ganti mode lagi
+        try: await websocket.send_text(json.dumps({"status": "active" if ok else "error", "mode": label}))
+        except: pass
+    task = asyncio.create_task(wait_hot())
+    _status_tasks.add(task)
+    task.add_done_callback(_status_tasks.discard)
+
 
 def reload_hardware():
     print("[SYSTEM] Reloading Hardware...")
@@ -52,7 +95,9 @@ def reload_hardware():
     try:
         robot_motor = MotorDriver(simulation=False)
         robot_extras = ExtraDrivers()
-        robot_sensors = SensorManager()
+        robot_sensors = SensorManager(notifier=sensor_notifier)
+        robot_sensors.start()
+        robot_sensors.attach_emergency_stop(robot_motor)
         print(f"[SYSTEM] Hardware Reloaded. User Mode: {cfg_mgr.use_user_config}")
     except Exception as e:
         print(f"[SYSTEM] Hardware Init Failed: {e}")
@@ -108,12 +153,31 @@ async def ws_control(websocket: WebSocket):
     CURRENT_CONTROLLER = "manual"
     robot_cam.ai.set_mode("off")
     print("[WS] MANUAL Connected - LOGGING ACTIVE")
+    proto = protocol.PROTO_JSON
     
     try:
         while True:
-            data = await websocket.receive_text()
-            payload = json.loads(data)
+            # Terima teks (JSON) maupun biner (struct, setelah negosiasi "hello")
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            data = message.get("bytes")
+            if data is not None:
+                if proto != protocol.PROTO_BINARY: continue
+                try: payload = protocol.decode(data)
+                except protocol.ProtocolError as e:
+                    print(f"[WS] {e}")
+                    continue
+            else:
+                payload = json.loads(message.get("text") or "{}")
             cmd = payload.get("cmd")
+
+            # --- NEGOSIASI PROTOKOL ---
+            if cmd == "hello":
+                proto = protocol.PROTO_BINARY if payload.get("proto") == protocol.PROTO_BINARY else protocol.PROTO_JSON
+                await websocket.send_text(json.dumps({"status": "ok", "proto": proto}))
+                print(f"[WS] MANUAL protocol: {proto}")
+                continue
             
             if CURRENT_CONTROLLER == "manual":
                 # --- MOTOR ---
@@ -121,8 +185,8 @@ async def ws_control(websocket: WebSocket):
                     y_val = float(payload.get("y", 0))
                     x_val = float(payload.get("x", 0))
                     speed_limit = float(payload.get("speed", 100))
-                    print(f"[MANUAL] Y: {y_val:.2f} | X: {x_val:.2f} | Limit: {speed_limit}%")
-                    robot_motor.move(y_val, x_val, speed_limit)
+                    # Hanya simpan setpoint, writer motor yang menulis GPIO (rate tetap)
+                    robot_motor.command(y_val, x_val, speed_limit)
                 
                 # --- SERVO ---
                 elif cmd == "servo": 
@@ -154,11 +218,14 @@ async def ws_autopilot(websocket: WebSocket):
     CURRENT_CONTROLLER = "autopilot"
     robot_cam.ai.set_mode("off") # Standby Awal
     print("[WS] AUTO PILOT Connected")
+    # Bangun saat ada hasil AI baru / pesan WS, bukan polling
+    waker = LoopWaker(websocket, robot_cam.ai.notifier).start()
 
     try:
         while True:
-            try:
-                data = await asyncio.wait_for(websocket.receive_text(), timeout=0.05)
+            # Timeout = batas umur hasil: jika capture/AI macet (tidak ada publish),
+            # loop tetap jalan, current() menolak hasil basi -> motor stop
+            for data in await waker.wait(timeout=AI_MAX_RESULT_AGE):
                 payload = json.loads(data)
                 
                 # Logic Switch ON/OFF
@@ -172,21 +239,19 @@ async def ws_autopilot(websocket: WebSocket):
                         robot_cam.ai.set_mode("off")
                         robot_motor.stop()
                         await websocket.send_text(json.dumps({"status": "stopped"}))
-                        
-            except asyncio.TimeoutError: pass
 
-            # Logic Drive
-            if CURRENT_CONTROLLER == "autopilot" and robot_cam.ai.mode == "auto_pilot" and robot_cam.ai.object_found:
-                error = robot_cam.ai.track_error_x
+            # Logic Drive (baca snapshot hasil AI terbaru)
+            res = robot_cam.ai.current()
+            if CURRENT_CONTROLLER == "autopilot" and res.mode == "auto_pilot" and res.object_found:
+                error = res.error_x
                 throttle = 0.35 - (abs(error) * 0.15)
                 steering = error * 0.8
-                robot_motor.move(throttle, steering, speed_limit=50)
+                robot_motor.move(throttle, steering, speed_limit=50, result=res)
             else:
                 robot_motor.stop()
-                
-            await asyncio.sleep(0.01)
     except: pass
     finally: 
+        waker.close()
         robot_motor.stop()
         robot_cam.ai.set_mode("off")
 
@@ -200,6 +265,7 @@ async def ws_tracking(websocket: WebSocket):
     
     robot_cam.ai.set_mode("off") 
     print("[WS] TRACKING Connected")
+    robot_cam.ai.prefetch("face_detection") # Kemungkinan mode berikutnya
     
     # SETUP AWAL
     pan_pos = 0.0
@@ -219,17 +285,24 @@ async def ws_tracking(websocket: WebSocket):
 
     await websocket.send_text(json.dumps({"status": "active", "mode": "standby"}))
 
+    # Gain & smoothing di-tuning untuk loop lama 25 Hz (sleep 0.04),
+    # sekarang loop bangun per hasil AI jadi diskalakan dengan dt sebenarnya
+    TICK = 0.04
+    last_tick = time.monotonic()
+    waker = LoopWaker(websocket, robot_cam.ai.notifier).start()
+
     try:
         while True:
-            # 1. TERIMA INPUT
-            try:
-                data = await asyncio.wait_for(websocket.receive_text(), timeout=0.05)
+            # 1. TERIMA INPUT (timeout: hasil basi ditolak current(), servo berhenti mengikuti)
+            for data in await waker.wait(timeout=AI_MAX_RESULT_AGE):
                 payload = json.loads(data)
                 
                 if payload.get("cmd") == "set_ai_mode":
                     req = payload.get("mode") 
                     if req == "none":
                         robot_cam.ai.set_mode("off")
+                        robot_cam.ai.set_roi_tracking(False)
+                        robot_cam.ai.set_hybrid_tracking(False)
                         # Reset
                         pan_pos = 0.0
                         tilt_pos = 0.0
@@ -249,25 +322,32 @@ async def ws_tracking(websocket: WebSocket):
                     elif req == "face_track":
                         # Pastikan visualisasi nyala
                         robot_cam.ai.set_deadzone(True, ZONA_X, ZONA_Y)
+                        robot_cam.ai.set_roi_tracking(True)
+                        robot_cam.ai.set_hybrid_tracking(True)
                         robot_cam.ai.set_mode("face_detection")
-                        await websocket.send_text(json.dumps({"status": "active", "mode": "face_track"}))
+                        await send_mode_status(websocket, "face_detection", "face_track")
                         
                     elif req == "color_track":
                         robot_cam.ai.set_deadzone(True, ZONA_X, ZONA_Y)
                         color = payload.get("color", "red") 
                         robot_cam.ai.set_color_target(color)
+                        robot_cam.ai.set_roi_tracking(True)
+                        robot_cam.ai.set_hybrid_tracking(False)
                         robot_cam.ai.set_mode("color_detection")
                         await websocket.send_text(json.dumps({"status": "active", "mode": f"track_{color}"}))     
-            except asyncio.TimeoutError: pass
 
             # 2. LOGIKA TRACKING
-            if CURRENT_CONTROLLER == "tracking" and robot_cam.ai.mode != "off" and robot_cam.ai.object_found:
+            now = time.monotonic()
+            k = min((now - last_tick) / TICK, 3.0)
+            last_tick = now
+            res = robot_cam.ai.current()
+            if CURRENT_CONTROLLER == "tracking" and res.mode != "off" and res.object_found:
                 
-                raw_error_x = robot_cam.ai.track_error_x 
-                raw_error_y = getattr(robot_cam.ai, 'track_error_y', 0.0)
+                raw_error_x = res.error_x 
+                raw_error_y = res.error_y
 
-                # Smoothing
-                alpha = 0.2
+                # Smoothing (setara alpha 0.2 per tick 0.04 s)
+                alpha = 1.0 - (1.0 - 0.2) ** k
                 smooth_x = (raw_error_x * alpha) + (prev_error_x * (1.0 - alpha))
                 smooth_y = (raw_error_y * alpha) + (prev_error_y * (1.0 - alpha))
                 prev_error_x = smooth_x
@@ -278,11 +358,11 @@ async def ws_tracking(websocket: WebSocket):
                 if abs(smooth_y) < ZONA_Y: smooth_y = 0
 
                 if smooth_x != 0 or smooth_y != 0:
-                    gain = 0.5 
+                    gain = 0.5 * k
                     delta_pan = smooth_x * gain
                     delta_tilt = smooth_y * gain
                     
-                    MAX_STEP = 1.0 
+                    MAX_STEP = 1.0 * k
                     delta_pan = max(-MAX_STEP, min(MAX_STEP, delta_pan))
                     delta_tilt = max(-MAX_STEP, min(MAX_STEP, delta_tilt))
 
@@ -294,17 +374,22 @@ async def ws_tracking(websocket: WebSocket):
                     
                     robot_extras.move_servo("pan", int(pan_pos))
                     robot_extras.move_servo("tilt", int(tilt_pos))
+                    robot_state.set("pan", int(pan_pos))
+                    robot_state.set("tilt", int(tilt_pos))
+                    TRACE.record(res, "servo", (int(pan_pos), int(tilt_pos)))
                 else:
                     # Trik Hening (Aggressive Detach)
                     robot_extras.detach_servos()
 
-            await asyncio.sleep(0.04) 
-
     except Exception as e:
         print(f"[TRACK] Error: {e}")
     finally:
+        waker.close()
+        robot_state.clear("pan", "tilt")
         # Matikan visualisasi deadzone saat disconnect
         robot_cam.ai.set_deadzone(False)
+        robot_cam.ai.set_roi_tracking(False)
+        robot_cam.ai.set_hybrid_tracking(False)
         robot_extras.detach_servos()
 
 
@@ -316,54 +401,60 @@ async def ws_recognition(websocket: WebSocket):
     CURRENT_CONTROLLER = "recognition"
     robot_cam.ai.set_mode("off") 
     print("[WS] RECOGNITION Connected (Standby)")
+    robot_cam.ai.prefetch("gesture_recognition")
     
-    lost_counter = 0
+    # Scan berbasis waktu (loop tidak lagi tick tetap 0.1 s)
+    lost_since = None
+    SCAN_TIME = 4.0
+    waker = LoopWaker(websocket, robot_cam.ai.notifier).start()
 
     try:
         while True:
-            try:
-                data = await asyncio.wait_for(websocket.receive_text(), timeout=0.05)
+            # Timeout: AI macet -> current() menolak hasil basi -> motor stop
+            for data in await waker.wait(timeout=AI_MAX_RESULT_AGE):
                 payload = json.loads(data)
                 
                 if payload.get("cmd") == "set_ai_mode":
                     req = payload.get("mode")
                     
                     if req == "gesture_cmd":
+                        robot_cam.ai.set_roi_tracking(False)
                         robot_cam.ai.set_mode("gesture_recognition")
-                        await websocket.send_text(json.dumps({"status": "active", "mode": "gesture_control"}))
+                        await send_mode_status(websocket, "gesture_recognition", "gesture_control")
                     
                     elif req == "color_follow":
                         # --- BACA PILIHAN WARNA USER ---
                         target_color = payload.get("color", "none") # Default red jika kosong
                         robot_cam.ai.set_color_target(target_color)
+                        robot_cam.ai.set_roi_tracking(True)
                         robot_cam.ai.set_mode("color_detection")
                         if target_color == "none":
                             await websocket.send_text(json.dumps({"status": "active", "mode": "waiting_color"}))
                         else:
                             await websocket.send_text(json.dumps({"status": "active", "mode": f"follow_{target_color}"}))
-            except asyncio.TimeoutError: pass
             
             if CURRENT_CONTROLLER == "recognition":
+                res = robot_cam.ai.current()
                 
                 # A. LOGIKA GESTURE
-                if robot_cam.ai.mode == "gesture_recognition":
-                    fingers = robot_cam.ai.gesture_data 
+                if res.mode == "gesture_recognition":
+                    fingers = res.gesture 
                     if fingers is not None:
-                        if fingers == 1: robot_motor.move(0.3, 0.0) 
-                        elif fingers == 2: robot_motor.move(-0.3, 0.0)
-                        elif fingers == 3: robot_motor.move(0.0, -0.4)
-                        elif fingers == 4: robot_motor.move(0.0, 0.4)
+                        if fingers == 1: robot_motor.move(0.3, 0.0, result=res) 
+                        elif fingers == 2: robot_motor.move(-0.3, 0.0, result=res)
+                        elif fingers == 3: robot_motor.move(0.0, -0.4, result=res)
+                        elif fingers == 4: robot_motor.move(0.0, 0.4, result=res)
                         elif fingers >= 5: robot_motor.stop()
                     else: robot_motor.stop()
 
                 # B. LOGIKA COLOR FOLLOW + FILTER WARNA
-                elif robot_cam.ai.mode == "color_detection":
-                    if robot_cam.ai.object_found:
-                        lost_counter = 0 
+                elif res.mode == "color_detection":
+                    if res.object_found:
+                        lost_since = None
                         robot_extras.move_servo("pan", 0)
                         
-                        error_x = robot_cam.ai.track_error_x
-                        area_size = robot_cam.ai.track_area
+                        error_x = res.error_x
+                        area_size = res.area
                         TARGET_SIZE = 0.15 
                         
                         throttle = 0.0
@@ -371,26 +462,28 @@ async def ws_recognition(websocket: WebSocket):
                         elif area_size > (TARGET_SIZE + 0.1): throttle = -0.30
                         
                         steering = error_x * 0.6
-                        robot_motor.move(throttle, steering)
+                        robot_motor.move(throttle, steering, result=res)
                     else:
-                        # SEARCHING BEHAVIOR
-                        lost_counter += 1
+                        # SEARCHING BEHAVIOR (sapuan sinus 60 derajat selama SCAN_TIME)
+                        now = time.monotonic()
+                        if lost_since is None: lost_since = now
+                        lost_time = now - lost_since
                         robot_motor.stop()
-                        if lost_counter < 40:
-                            scan_angle = int(math.sin(lost_counter * 0.2) * 60)
+                        if lost_time < SCAN_TIME:
+                            scan_angle = int(math.sin(lost_time * 2.0) * 60)
                             robot_extras.move_servo("pan", scan_angle)
                         else:
                             robot_extras.move_servo("pan", 0)
                 else:
                     robot_motor.stop()
 
-            await asyncio.sleep(0.1)
-
     except Exception as e:
         print(f"[RECOG] Error: {e}")
     finally:
+        waker.close()
         robot_motor.stop()
         robot_extras.move_servo("pan", 0)
+        robot_cam.ai.set_roi_tracking(False)
         robot_cam.ai.set_mode("off")
 
 # 5. OBJECT DETECTION (STANDBY FIRST)
@@ -402,6 +495,7 @@ async def ws_obj_detection(websocket: WebSocket):
     
     robot_cam.ai.set_mode("off") 
     print("[WS] DETECTION HUB: Connected")
+    robot_cam.ai.prefetch("object_detection")
     
     try:
         while True:
@@ -422,7 +516,7 @@ async def ws_obj_detection(websocket: WebSocket):
                 # Modus deteksi lainnya (Face, Object, Gesture) normal
                 else:
                     robot_cam.ai.set_mode(req_mode)
-                    await websocket.send_text(json.dumps({"status": "active", "mode": req_mode}))
+                    await send_mode_status(websocket, req_mode, req_mode)
             
     except Exception as e:
         print(f"[WS] Error: {e}")
@@ -438,28 +532,32 @@ async def ws_qr(websocket: WebSocket):
     
     robot_cam.ai.set_mode("off") 
     print("[WS] QR Connected")
+    robot_cam.ai.prefetch("qr_recognition")
     
     # Kita hapus last_scan_time yang statis, kita pakai logika blocking di bawah
+    waker = LoopWaker(websocket, robot_cam.ai.notifier).start()
     
     try:
         while True:
-            # 1. Terima Perintah Switch ON/OFF dari UI
-            try:
-                data = await asyncio.wait_for(websocket.receive_text(), timeout=0.05)
+            # 1. Terima Perintah Switch ON/OFF dari UI (bangun saat ada hasil AI / pesan,
+            #    atau timeout agar hasil basi saat AI macet tetap terdeteksi)
+            for data in await waker.wait(timeout=AI_MAX_RESULT_AGE):
                 payload = json.loads(data)
                 if payload.get("cmd") == "set_ai_mode":
                     mode = payload.get("mode")
                     if mode == "start":
                         robot_cam.ai.set_mode("qr_recognition")
-                        await websocket.send_text(json.dumps({"status": "active", "mode": "qr_scanner"}))
+                        await send_mode_status(websocket, "qr_recognition", "qr_scanner")
                     elif mode == "stop":
                         robot_cam.ai.set_mode("off")
                         await websocket.send_text(json.dumps({"status": "stopped"}))
-            except asyncio.TimeoutError: pass
             
             # 2. Logika Utama QR
             if CURRENT_CONTROLLER == "qr" and robot_cam.ai.mode == "qr_recognition":
-                current_qr = robot_cam.ai.qr_data
+                # QR dari hasil yang sudah basi (capture/AI macet) tidak dieksekusi
+                stale = robot_cam.ai.result.age() > AI_MAX_RESULT_AGE
+                current_qr = None if stale else robot_cam.ai.qr_data
+                if stale: robot_motor.stop()
                 
                 # Jika ada QR terdeteksi, kita proses lalu KITA BLOCKING (WAIT)
                 if current_qr is not None:
@@ -541,12 +639,11 @@ async def ws_qr(websocket: WebSocket):
                     
                     # Beri jeda sedikit sebelum baca lagi
                     await asyncio.sleep(1.0)
-
-            await asyncio.sleep(0.1)
             
     except Exception as e:
         print(f"[QR] Error: {e}")
     finally:
+        waker.close()
         robot_motor.stop()
         robot_extras.set_buzzer("off")
         robot_cam.ai.set_mode("off")
@@ -589,32 +686,30 @@ async def ws_avoid(websocket: WebSocket):
     dist_left = 0
     dist_right = 0
     
-    # --- SENSOR TASK ---
-    async def sensor_loop():
-        ALPHA = 0.6 
-        while True:
-            try:
-                raw = robot_sensors.get_distance()
-                if 0 <= raw < 400: 
-                    sensor_data["dist"] = (sensor_data["dist"] * (1-ALPHA)) + (raw * ALPHA)
-                    robot_cam.ai.update_distance(sensor_data["dist"])
-                
-                sensor_data["panic"] = robot_sensors.check_panic()
-                await asyncio.sleep(0.04)
-            except: pass
-
-    sensor_task = asyncio.create_task(sensor_loop())
+    # --- SENSOR ---
+    # Tidak menyentuh hardware: hanya membaca snapshot dari thread sampling.
+    # Loop dibangunkan setiap snapshot baru (SENSOR_RATE_HZ) atau pesan WS.
+    ALPHA = 0.6 
+    last_snap_ts = 0.0
+    waker = LoopWaker(websocket, sensor_notifier).start()
 
     try:
         while True:
             # 1. INPUT HANDLING
-            try:
-                data = await asyncio.wait_for(websocket.receive_text(), timeout=0.01)
+            for data in await waker.wait():
                 if json.loads(data).get("cmd") == "set_ai_mode":
                     state = "FORWARD"
                     retreat_locked = False
                     robot_motor.stop()
-            except asyncio.TimeoutError: pass
+
+            snap = robot_sensors.snapshot
+            if snap.ts != last_snap_ts:
+                last_snap_ts = snap.ts
+                raw = snap.distance
+                if 0 <= raw < 400: 
+                    sensor_data["dist"] = (sensor_data["dist"] * (1-ALPHA)) + (raw * ALPHA)
+                    robot_cam.ai.update_distance(sensor_data["dist"])
+                sensor_data["panic"] = snap.panic
 
             if CURRENT_CONTROLLER == "avoid":
                 
@@ -622,6 +717,9 @@ async def ws_avoid(websocket: WebSocket):
                 is_panic = sensor_data["panic"]
                 now = time.monotonic()
                 elapsed = now - state_ts
+                robot_state.set("avoid", state)
+                robot_state.set("avoid_dist", distance)
+                robot_state.set("retreat_locked", retreat_locked)
 
                 # ====================================================
                 # 🔴 PRIORITAS 1: SENSOR BFD (LOCKING)
@@ -749,434 +847,127 @@ async def ws_avoid(websocket: WebSocket):
 
             else:
                 robot_motor.stop()
-            
-            await asyncio.sleep(0.01)
-
-    except Exception as e:
-        print(f"[AVOID] Error: {e}")
-    finally:
-        sensor_task.cancel()
-        robot_motor.stop()
-        robot_cam.ai.update_distance(None)
-    global CURRENT_CONTROLLER
-    await websocket.accept()
-    CURRENT_CONTROLLER = "avoid"
-    
-    robot_cam.ai.set_mode("off")
-    print("[WS] AVOID Connected - FAILSAFE MODE")
-    
-    # --- SHARED DATA ---
-    sensor_data = {"dist": 100.0, "panic": False}
-    
-    # --- CONFIG ---
-    SPEED_MAJU    = 0.05
-    SPEED_MUNDUR  = -0.50
-    SPEED_PUTAR   = 0.40
-    
-    ZONA_KRITIS   = 10  
-    ZONA_BREAK    = 15  
-    SYARAT_JALAN  = 30  
-    
-    # [BARU] Batas waktu maksimal mundur (Failsafe jika sensor error)
-    MAX_RETREAT_TIME = 2.0  # Maksimal mundur 2 detik, apapun yang terjadi
-    
-    TIME_SCAN_TURN = 0.8 
-    TIME_STABIL    = 0.5
-
-    state = "FORWARD"
-    retreat_locked = False
-    
-    state_ts = time.monotonic()
-    dist_left = 0
-    dist_right = 0
-    
-    # --- SENSOR TASK ---
-    async def sensor_loop():
-        ALPHA = 0.6 
-        while True:
-            try:
-                raw = robot_sensors.get_distance()
-                # Terima 0 sebagai valid (jarak sangat dekat/error) untuk safety
-                if 0 <= raw < 400: 
-                    sensor_data["dist"] = (sensor_data["dist"] * (1-ALPHA)) + (raw * ALPHA)
-                    robot_cam.ai.update_distance(sensor_data["dist"])
-                
-                sensor_data["panic"] = robot_sensors.check_panic()
-                await asyncio.sleep(0.04)
-            except: pass
-
-    sensor_task = asyncio.create_task(sensor_loop())
-
-    try:
-        while True:
-            # 1. INPUT HANDLING
-            try:
-                data = await asyncio.wait_for(websocket.receive_text(), timeout=0.01)
-                if json.loads(data).get("cmd") == "set_ai_mode":
-                    state = "FORWARD"
-                    retreat_locked = False
-                    robot_motor.stop()
-            except asyncio.TimeoutError: pass
-
-            if CURRENT_CONTROLLER == "avoid":
-                
-                distance = sensor_data["dist"]
-                is_panic = sensor_data["panic"]
-                now = time.monotonic()
-                elapsed = now - state_ts
-
-                # ====================================================
-                # 🔴 PRIORITAS 1: SENSOR BFD (LOCKING)
-                # ====================================================
-                if is_panic and not retreat_locked:
-                    print("[PRIORITY] BFD TRIGGERED! Locking Retreat.")
-                    robot_motor.stop()
-                    await asyncio.sleep(0.1)
-                    retreat_locked = True
-                    state = "RETREAT"
-                    state_ts = now # Reset waktu untuk timeout failsafe
-                    continue 
-
-                # ====================================================
-                # ⚙️ STATE MACHINE
-                # ====================================================
-
-                # 1. FORWARD
-                if state == "FORWARD":
-                    if distance < ZONA_KRITIS:
-                        if not retreat_locked:
-                            print(f"[FWD] Kritis {distance:.1f}cm. Mundur.")
-                            robot_motor.stop()
-                            state = "RETREAT"
-                            state_ts = now # Reset waktu
-                    
-                    elif distance <= ZONA_BREAK:
-                        print(f"[FWD] Break Zone {distance:.1f}cm. Stop & Scan.")
-                        robot_motor.stop()
-                        state = "SCAN_INIT" 
-                        
-                    else:
-                        robot_motor.move(SPEED_MAJU, 0.0)
-
-                # 2. RETREAT (DENGAN FAILSAFE)
-                elif state == "RETREAT":
-                    
-                    # SYARAT 1: Jarak sudah cukup jauh (Ideal)
-                    succes_condition = distance >= ZONA_BREAK
-                    
-                    # SYARAT 2: Timeout (Sensor Error / Stuck)
-                    # Jika sudah mundur lebih dari 2 detik tapi sensor masih bilang dekat
-                    timeout_condition = elapsed > MAX_RETREAT_TIME
-                    
-                    if succes_condition:
-                        print(f"[RETREAT] Sukses ({distance:.1f}cm). Stop.")
-                        robot_motor.stop()
-                        state = "SCAN_INIT"
-                        
-                    elif timeout_condition:
-                        print(f"[RETREAT] TIMEOUT! Sensor mungkin error ({distance:.1f}cm). Paksa Stop.")
-                        robot_motor.stop()
-                        state = "SCAN_INIT" # Tetap lanjut Scan walau sensor error
-                        
-                    else:
-                        # Jika belum target DAN belum timeout -> Lanjut mundur
-                        robot_motor.move(SPEED_MUNDUR, 0.0)
-
-                # 3. SCANNING SEQUENCE
-                elif state == "SCAN_INIT":
-                    state = "SCAN_LEFT_MOVE"
-                    state_ts = now
-                
-                elif state == "SCAN_LEFT_MOVE":
-                    robot_motor.move(0.0, -SPEED_PUTAR)
-                    if elapsed > TIME_SCAN_TURN:
-                        robot_motor.stop()
-                        state = "SCAN_LEFT_READ"
-                        state_ts = now
-                
-                elif state == "SCAN_LEFT_READ":
-                    if elapsed > TIME_STABIL:
-                        dist_left = distance
-                        print(f"[SCAN] Kiri: {dist_left:.1f} cm")
-                        state = "SCAN_RIGHT_MOVE"
-                        state_ts = now
-
-                elif state == "SCAN_RIGHT_MOVE":
-                    robot_motor.move(0.0, SPEED_PUTAR)
-                    if elapsed > (TIME_SCAN_TURN * 2.2):
-                        robot_motor.stop()
-                        state = "SCAN_RIGHT_READ"
-                        state_ts = now
-
-                elif state == "SCAN_RIGHT_READ":
-                    if elapsed > TIME_STABIL:
-                        dist_right = distance
-                        print(f"[SCAN] Kanan: {dist_right:.1f} cm")
-                        
-                        target_dir = "NONE"
-                        if dist_left >= SYARAT_JALAN and dist_right >= SYARAT_JALAN:
-                            target_dir = "LEFT" if dist_left > dist_right else "RIGHT"
-                        elif dist_left >= SYARAT_JALAN:
-                            target_dir = "LEFT"
-                        elif dist_right >= SYARAT_JALAN:
-                            target_dir = "RIGHT"
-                        
-                        if target_dir != "NONE":
-                            print(f"[DECIDE] {target_dir}")
-                            state = "TURN_TO_LEFT" if target_dir == "LEFT" else "TURN_TO_RIGHT"
-                        else:
-                            print("[DECIDE] Buntu.")
-                            state = "DEAD_END"
-                        
-                        state_ts = now
-
-                # 4. TURN & EXECUTE
-                elif state == "TURN_TO_LEFT":
-                    robot_motor.move(0.0, -SPEED_PUTAR)
-                    if elapsed > (TIME_SCAN_TURN * 2.2): 
-                        robot_motor.stop()
-                        state = "RESET_AND_GO"
-                
-                elif state == "TURN_TO_RIGHT":
-                    robot_motor.stop()
-                    state = "RESET_AND_GO"
-
-                # 5. RESET LOCK
-                elif state == "RESET_AND_GO":
-                    retreat_locked = False 
-                    state = "FORWARD"
-
-                # 6. DEAD END
-                elif state == "DEAD_END":
-                    robot_extras.set_buzzer("on")
-                    if elapsed > 3.0:
-                        robot_extras.set_buzzer("off")
-                        state = "SCAN_INIT" 
-                        state_ts = now
-
-            else:
-                robot_motor.stop()
-            
-            await asyncio.sleep(0.01)
 
     except Exception as e:
         print(f"[AVOID] Error: {e}")
     finally:
-        sensor_task.cancel()
+        waker.close()
         robot_motor.stop()
         robot_cam.ai.update_distance(None)
-    global CURRENT_CONTROLLER
+        robot_state.clear("avoid", "avoid_dist", "retreat_locked")
+
+
+# 7. TELEMETRY (PUSH STATE KE DASHBOARD)
+def telemetry_snapshot():
+    """Snapshot datar (key pendek) hasil AI, sensor, motor & state loop"""
+    res = robot_cam.ai.result
+    snap = robot_sensors.snapshot
+    motor = robot_motor.stats()
+    data = {
+        "controller": CURRENT_CONTROLLER,
+        "ai.mode": res.mode,
+        "ai.ready": robot_cam.ai.is_ready(),
+        "ai.seq": res.seq,
+        "ai.found": res.object_found,
+        "ai.ex": res.error_x,
+        "ai.ey": res.error_y,
+        "ai.area": res.area,
+        "ai.box": res.box,
+        "ai.gesture": res.gesture,
+        "ai.qr": res.qr_data,
+        "ai.lat_ms": res.latency * 1000.0,
+        "dist": snap.distance,
+        "lines": snap.lines,
+        "near": snap.near,
+        "clap": snap.clap,
+        "panic": snap.panic,
+        "pwm_l": motor["pwm_left"],
+        "pwm_r": motor["pwm_right"],
+        "estop": motor["estop_latched"],
+    }
+    # Geometri overlay untuk viewer /video_feed?overlay=clean
+    data.update(robot_cam.ai.overlay_state(res))
+    for key, value in robot_state.snapshot().items():
+        data["state." + key] = value
+    return data
+
+@app.websocket("/ws/telemetry")
+async def ws_telemetry(websocket: WebSocket):
+    """
+    Push snapshot max TELEMETRY_RATE_HZ, hanya field yang berubah (delta).
+    Client: {"type": "full"|"delta", "ts": ..., "data": {...}}.
+    Kirim {"cmd": "full"} untuk minta snapshot penuh.
+    """
     await websocket.accept()
-    CURRENT_CONTROLLER = "avoid"
-    
-    robot_cam.ai.set_mode("off")
-    print("[WS] AVOID Connected - BREAK ZONE LOGIC")
-    
-    # --- SHARED DATA ---
-    sensor_data = {"dist": 100.0, "panic": False}
-    
-    # --- CONFIG ---
-    SPEED_MAJU    = 0.05
-    SPEED_MUNDUR  = -0.50
-    SPEED_PUTAR   = 0.40
-    
-    # --- DEFINISI ZONA (Sesuai Request) ---
-    ZONA_KRITIS   = 10  # < 10cm: WAJIB MUNDUR
-    ZONA_BREAK    = 15  # 10-15cm: STOP & SCAN (Cari Jalan)
-    SYARAT_JALAN  = 30  # Syarat jalan dianggap lega (> 30cm)
-    
-    TIME_SCAN_TURN = 0.8 
-    TIME_STABIL    = 0.5
-
-    state = "FORWARD"
-    retreat_locked = False
-    
-    state_ts = time.monotonic()
-    dist_left = 0
-    dist_right = 0
-    
-    # --- SENSOR TASK ---
-    async def sensor_loop():
-        ALPHA = 0.6 
-        while True:
-            try:
-                raw = robot_sensors.get_distance()
-                if 2 < raw < 400:
-                    sensor_data["dist"] = (sensor_data["dist"] * (1-ALPHA)) + (raw * ALPHA)
-                    robot_cam.ai.update_distance(sensor_data["dist"])
-                
-                sensor_data["panic"] = robot_sensors.check_panic()
-                await asyncio.sleep(0.04)
-            except: pass
-
-    sensor_task = asyncio.create_task(sensor_loop())
+    print("[WS] TELEMETRY Connected")
+    encoder = DeltaEncoder(keyframe_every=TELEMETRY_KEYFRAME_S)
+    interval = 1.0 / TELEMETRY_RATE_HZ
+    last_send = 0.0
+    waker = LoopWaker(websocket, robot_cam.ai.notifier, sensor_notifier).start()
 
     try:
         while True:
-            # 1. INPUT HANDLING
-            try:
-                data = await asyncio.wait_for(websocket.receive_text(), timeout=0.01)
-                if json.loads(data).get("cmd") == "set_ai_mode":
-                    state = "FORWARD"
-                    retreat_locked = False
-                    robot_motor.stop()
-            except asyncio.TimeoutError: pass
-
-            if CURRENT_CONTROLLER == "avoid":
-                
-                distance = sensor_data["dist"]
-                is_panic = sensor_data["panic"]
-                now = time.monotonic()
-                elapsed = now - state_ts
-
-                # ====================================================
-                # 🔴 PRIORITAS 1: SENSOR BFD (TABRAKAN FISIK)
-                # ====================================================
-                # Jika sensor sentuh kena, override semua logika jarak
-                if is_panic and not retreat_locked:
-                    print("[PRIORITY] BFD TRIGGERED! Locking Retreat.")
-                    robot_motor.stop()
-                    await asyncio.sleep(0.1)
-                    retreat_locked = True
-                    state = "RETREAT"
-                    continue 
-
-                # ====================================================
-                # ⚙️ STATE MACHINE
-                # ====================================================
-
-                # 1. FORWARD (Logika Utama)
-                if state == "FORWARD":
-                    
-                    # KONDISI A: < 10 cm (ZONA KRITIS)
-                    if distance < ZONA_KRITIS:
-                        if not retreat_locked:
-                            print(f"[FWD] Kritis {distance:.1f}cm (<10). Mundur.")
-                            robot_motor.stop()
-                            state = "RETREAT"
-                    
-                    # KONDISI B: 10 - 15 cm (ZONA BREAK)
-                    elif distance <= ZONA_BREAK:
-                        # Robot berhenti dan mulai mencari jalan (Scan)
-                        # TIDAK PERLU MUNDUR, langsung Scan.
-                        print(f"[FWD] Break Zone {distance:.1f}cm. Stop & Scan.")
-                        robot_motor.stop()
-                        state = "SCAN_INIT" 
-                        
-                    # KONDISI C: > 15 cm (ZONA AMAN)
-                    else:
-                        robot_motor.move(SPEED_MAJU, 0.0)
-
-                # 2. RETREAT (Hanya aktif jika < 10cm atau BFD Kena)
-                elif state == "RETREAT":
-                    # Mundur sampai masuk ke batas atas Zona Break (15cm)
-                    if distance < ZONA_BREAK:
-                        robot_motor.move(SPEED_MUNDUR, 0.0)
-                    else:
-                        print(f"[RETREAT] Sudah mencapai {distance:.1f}cm (Zona Break). Stop.")
-                        robot_motor.stop()
-                        state = "SCAN_INIT" # Setelah mundur, WAJIB Scan
-
-                # 3. SCANNING SEQUENCE (Sama seperti sebelumnya)
-                
-                elif state == "SCAN_INIT":
-                    state = "SCAN_LEFT_MOVE"
-                    state_ts = now
-                
-                elif state == "SCAN_LEFT_MOVE":
-                    robot_motor.move(0.0, -SPEED_PUTAR)
-                    if elapsed > TIME_SCAN_TURN:
-                        robot_motor.stop()
-                        state = "SCAN_LEFT_READ"
-                        state_ts = now
-                
-                elif state == "SCAN_LEFT_READ":
-                    if elapsed > TIME_STABIL:
-                        dist_left = distance
-                        print(f"[SCAN] Kiri: {dist_left:.1f} cm")
-                        state = "SCAN_RIGHT_MOVE"
-                        state_ts = now
-
-                elif state == "SCAN_RIGHT_MOVE":
-                    robot_motor.move(0.0, SPEED_PUTAR)
-                    # Putar balik dari kiri ke kanan (x2.2)
-                    if elapsed > (TIME_SCAN_TURN * 2.2):
-                        robot_motor.stop()
-                        state = "SCAN_RIGHT_READ"
-                        state_ts = now
-
-                elif state == "SCAN_RIGHT_READ":
-                    if elapsed > TIME_STABIL:
-                        dist_right = distance
-                        print(f"[SCAN] Kanan: {dist_right:.1f} cm")
-                        
-                        # --- LOGIKA KEPUTUSAN ---
-                        # Cari jalan yang > 30 cm
-                        target_dir = "NONE"
-                        
-                        # Prioritas: Pilih yang > 30cm DAN paling jauh
-                        if dist_left >= SYARAT_JALAN and dist_right >= SYARAT_JALAN:
-                            target_dir = "LEFT" if dist_left > dist_right else "RIGHT"
-                        elif dist_left >= SYARAT_JALAN:
-                            target_dir = "LEFT"
-                        elif dist_right >= SYARAT_JALAN:
-                            target_dir = "RIGHT"
-                        
-                        if target_dir != "NONE":
-                            print(f"[DECIDE] Jalan ketemu: {target_dir}")
-                            if target_dir == "LEFT":
-                                state = "TURN_TO_LEFT"
-                            else:
-                                state = "TURN_TO_RIGHT"
-                        else:
-                            print("[DECIDE] Buntu (< 30cm).")
-                            state = "DEAD_END"
-                        
-                        state_ts = now
-
-                # 4. TURN & EXECUTE
-                elif state == "TURN_TO_LEFT":
-                    robot_motor.move(0.0, -SPEED_PUTAR)
-                    if elapsed > (TIME_SCAN_TURN * 2.2): 
-                        robot_motor.stop()
-                        state = "RESET_AND_GO"
-                
-                elif state == "TURN_TO_RIGHT":
-                    robot_motor.stop() # Sudah di kanan
-                    state = "RESET_AND_GO"
-
-                # 5. RESET LOCK & MAJU
-                elif state == "RESET_AND_GO":
-                    retreat_locked = False 
-                    state = "FORWARD"
-
-                # 6. DEAD END (Buzzer)
-                elif state == "DEAD_END":
-                    robot_extras.set_buzzer("on")
-                    if elapsed > 3.0:
-                        robot_extras.set_buzzer("off")
-                        # Setelah 3 detik, coba scan ulang (siapa tau jalan kebuka)
-                        state = "SCAN_INIT" 
-                        state_ts = now
-
-            else:
-                robot_motor.stop()
-            
-            await asyncio.sleep(0.01)
-
+            for data in await waker.wait(timeout=TELEMETRY_KEYFRAME_S):
+                if json.loads(data).get("cmd") == "full":
+                    encoder.request_keyframe()
+
+            # Rate limit: event yang datang lebih cepat digabung jadi satu kiriman
+            sisa = interval - (time.monotonic() - last_send)
+            if sisa > 0: await asyncio.sleep(sisa)
+            last_send = time.monotonic()
+
+            packet = encoder.encode(telemetry_snapshot(), last_send)
+            if packet is not None:
+                packet["ts"] = round(last_send, 3)
+                await websocket.send_text(json.dumps(packet))
     except Exception as e:
-        print(f"[AVOID] Error: {e}")
+        if not isinstance(e, WebSocketDisconnect): print(f"[TELEMETRY] Error: {e}")
     finally:
-        sensor_task.cancel()
-        robot_motor.stop()
-        robot_cam.ai.update_distance(None)
+        waker.close()
+        print(f"[WS] TELEMETRY Disconnected {encoder.stats()}")
 
 
 @app.get("/")
 def index(): return {"status": "Raspbot RTKAv2", "controller": CURRENT_CONTROLLER}
 
 @app.get("/video_feed")
-def video_feed(): return StreamingResponse(robot_cam.generate_frames(), media_type="multipart/x-mixed-replace;boundary=frame")
+async def video_feed(request: Request):
+    # ?overlay=clean -> frame tanpa gambar overlay (geometri lewat /ws/telemetry)
+    overlay = request.query_params.get("overlay", "annotated")
+    client = robot_cam.add_client(f"{request.client.host}:{request.client.port}" if request.client else "?", overlay)
+    return StreamingResponse(robot_cam.stream_frames(client), media_type="multipart/x-mixed-replace;boundary=frame")
+
+@app.get("/estop")
+def estop(): return robot_sensors.estop_stats()
+
+@app.post("/estop/release")
+def estop_release(): return robot_sensors.release_estop()
+
+@app.get("/ai/status")
+def ai_status(): return robot_cam.ai.mode_status()
+
+@app.get("/ai/scheduler")
+def ai_scheduler(): return robot_cam.scheduler.stats()
+
+@app.get("/startup")
+def startup_report():
+    """Waktu startup: fase main.py + biaya import/init backend yang dimuat lazy"""
+    return STARTUP.to_dict()
+
+@app.get("/metrics/latency")
+def metrics_latency(reset: bool = False):
+    """p50/p95/p99 per tahap: cap.read, resize, ai.<mode>, overlay, imencode, motor.move"""
+    stats = LATENCY.stats()
+    if reset: LATENCY.reset()
+    return stats
+
+@app.get("/metrics/trace")
+def metrics_trace(limit: int = 50):
+    """Jejak capture -> hasil AI -> perintah motor/servo per frame"""
+    return {"stale_rejects": robot_cam.ai.stale_rejects, "trace": TRACE.to_list(limit)}
+
+@app.get("/video_feed/stats")
+def video_feed_stats(): return {"clients": robot_cam.client_stats(), "jpeg_encoded": robot_cam.encode_stats(), "capture": robot_cam.capture_stats()}
 
 if __name__ == "__main__":
     uvicorn.run(app, host=HOST, port=PORT, log_level="warning")
\ No newline at end of file
@@ -1,18 +1,411 @@
 import cv2
 import numpy as np
 import os
-import mediapipe as mp
 import time
-from pyzbar.pyzbar import decode
+import threading
+from config import AI_EXTRAPOLATE, AI_EXTRAPOLATE_MAX, AI_MAX_RESULT_AGE, COLOR_TABLE, COLOR_MIN_AREA
+from config import ROI_EXPAND, ROI_MIN_SIZE, ROI_MAX_MISSES
+from config import TRACKER_TYPE, TRACKER_REDETECT_EVERY, TRACKER_MAX_SCALE
+from config import FRAME_WIDTH, FRAME_HEIGHT, AI_WARMUP_RUNS
+from config import TFLITE_MODELS, TFLITE_MODEL, TFLITE_NUM_THREADS, TFLITE_XNNPACK
+from config import AI_WORKERS, AI_OUT_OF_PROCESS
+from modules.notify import AsyncNotifier
+from modules.metrics import LATENCY
+from modules.loader import STARTUP, lazy_import
 
-# Cek Import TensorFlow Lite
-try:
-    import tflite_runtime.interpreter as tflite
-except ImportError:
+# mediapipe / tflite / pyzbar TIDAK diimport di sini: baru dimuat saat mode
+# yang membutuhkannya pertama kali dipilih (lihat AIBackends & loader.py)
+
+# Backend yang dibutuhkan tiap mode (mode lain cukup OpenCV)
+MODE_BACKENDS = {
+    "object_detection": "ssd",
+    "face_detection": "face",
+    "gesture_recognition": "hands",
+    "qr_recognition": "qr",
+}
+
+
+def load_tflite():
+    """tflite_runtime, fallback tensorflow.lite. None jika tidak terpasang."""
     try:
-        import tensorflow.lite as tflite
+        return lazy_import("tflite_runtime.interpreter")
     except ImportError:
-        pass
+        try:
+            return lazy_import("tensorflow.lite")
+        except ImportError:
+            return None
+
+
+def tflite_threads(requested):
+    """
+    Thread per interpreter. Worker pool menjalankan AI_WORKERS interpreter
+    sekaligus, jadi total thread dibatasi jumlah core (tidak oversubscribe
+    dan thread capture/encode tidak kelaparan).
+    """
+    if not requested:
+        return requested
+    cores = os.cpu_count() or 1
+    sets = 1 if AI_OUT_OF_PROCESS else max(1, AI_WORKERS)
+    per_set = max(1, cores // sets)
+    if requested > per_set:
+        print(f"[AI] {requested} thread x {sets} interpreter > {cores} core, dipakai {per_set} thread/interpreter")
+        return per_set
+    return requested
+
+
+def make_interpreter(tflite, model_path, num_threads=None, xnnpack=True):
+    """
+    Interpreter dengan jumlah thread & XNNPACK sesuai config.
+    XNNPACK = delegate default TFLite; dimatikan lewat op resolver
+    BUILTIN_WITHOUT_DEFAULT_DELEGATES. Opsi yang tidak didukung versi
+    tflite terpasang dilewati.
+    """
+    kwargs = {"model_path": model_path}
+    if num_threads:
+        kwargs["num_threads"] = num_threads
+    resolvers = getattr(tflite, "OpResolverType", None) or getattr(getattr(tflite, "experimental", None), "OpResolverType", None)
+    if resolvers is not None:
+        kwargs["experimental_op_resolver_type"] = resolvers.AUTO if xnnpack else resolvers.BUILTIN_WITHOUT_DEFAULT_DELEGATES
+    try:
+        return tflite.Interpreter(**kwargs)
+    except TypeError:
+        # tflite lama: tanpa num_threads / op resolver
+        return tflite.Interpreter(model_path=model_path)
+
+class AIResult:
+    """
+    Snapshot hasil AI untuk satu frame.
+    Dipublish sekali lalu hanya dibaca (jangan diubah setelah publish).
+    """
+    __slots__ = ("mode", "seq", "frame_ts", "ts", "latency", "tracked", "tracker_next", "object_found",
+                 "error_x", "error_y", "area", "box", "qr_data", "gesture", "shapes")
+
+    def __init__(self, mode="off", seq=0, frame_ts=0.0):
+        self.mode = mode
+        self.seq = seq              # seq frame sumber (dari FrameBuffer)
+        self.frame_ts = frame_ts    # waktu capture frame sumber
+        self.ts = time.monotonic()  # waktu hasil selesai dihitung
+        self.latency = 0.0          # lama analyze() (detik)
+        self.tracked = False        # Hybrid: hasil dari tracker (bukan detektor)
+        self.tracker_next = False   # Hybrid: frame berikutnya cukup tracker (bukan deteksi ulang)
+        self.object_found = False
+        self.error_x = 0.0
+        self.error_y = 0.0
+        self.area = 0.0
+        self.box = None             # (x, y, w, h) target utama, koordinat frame penuh
+        self.qr_data = None
+        self.gesture = None
+        # Geometri overlay (rect/text/line/poly/hand) dalam koordinat piksel frame
+        self.shapes = []
+
+    def set_target(self, x, y, w, h, w_img, h_img):
+        """Hitung error tracking ternormalisasi dari bounding box"""
+        self.box = (x, y, w, h)
+        cx = x + (w // 2)
+        cy = y + (h // 2)
+        self.error_x = (cx - (w_img / 2)) / (w_img / 2)
+        self.error_y = (cy - (h_img / 2)) / (h_img / 2)
+        self.object_found = True
+
+    def age(self, now=None):
+        """Umur hasil sejak frame sumbernya di-capture (detik), 0 jika tidak diketahui"""
+        if self.frame_ts <= 0:
+            return 0.0
+        return (time.monotonic() if now is None else now) - self.frame_ts
+
+
+def create_tracker(kind):
+    """Buat tracker OpenCV (KCF/MOSSE/CSRT). None jika build OpenCV tidak punya."""
+    factory = "Tracker%s_create" % kind.upper()
+    for owner in (cv2, getattr(cv2, "legacy", None)):
+        fn = getattr(owner, factory, None) if owner is not None else None
+        if fn is not None:
+            return fn()
+    return None
+
+
+class ColorLabeler:
+    """
+    COLOR_TABLE dikompilasi sekali jadi lookup table (Hue -> rentang, rentang -> batas S/V).
+    Per frame cukup SATU pass untuk semua warna target sekaligus, jadi mode "all"
+    biayanya hampir sama dengan satu warna.
+    """
+    def __init__(self, table, min_area):
+        self.min_area = min_area
+        self.kernel = np.ones((5, 5), np.uint8)
+        self.ranges = []  # (label_idx, lower, upper)
+        self.names = [None]  # label_idx -> nama (0 = bukan warna)
+        self.bgr = [None]
+        for name, lower, upper, bgr in table:
+            if name not in self.names:
+                self.names.append(name)
+                self.bgr.append(tuple(bgr))
+            self.ranges.append((self.names.index(name), lower, upper))
+        self._compiled = {}  # target -> LUT (cache per target)
+
+    def _compile(self, target):
+        """LUT untuk target ("all" atau satu nama warna)"""
+        hue_lut = np.zeros(256, np.uint8)   # H -> id rentang (1..N), 0 = tidak ada
+        smin = np.full(256, 255, np.uint8)
+        vmin = np.full(256, 255, np.uint8)
+        smax = np.zeros(256, np.uint8)
+        vmax = np.zeros(256, np.uint8)
+        to_label = np.zeros(256, np.uint8)  # id rentang -> label_idx
+        labels = set()
+
+        for rid, (label_idx, lower, upper) in enumerate(self.ranges, start=1):
+            if target != "all" and self.names[label_idx] != target:
+                continue
+            hue = np.arange(256)
+            sel = (hue >= lower[0]) & (hue <= upper[0]) & (hue_lut == 0)  # Rentang pertama menang
+            hue_lut[sel] = rid
+            smin[rid], vmin[rid] = lower[1], lower[2]
+            smax[rid], vmax[rid] = upper[1], upper[2]
+            to_label[rid] = label_idx
+            labels.add(label_idx)
+
+        # Batas atas 255 tidak perlu dicek (lebih hemat)
+        used = [rid for rid in range(1, len(self.ranges) + 1) if to_label[rid]]
+        check_upper = any(smax[r] < 255 or vmax[r] < 255 for r in used)
+        compiled = (hue_lut, smin, vmin, smax, vmax, to_label, sorted(labels), check_upper)
+        self._compiled[target] = compiled
+        return compiled
+
+    def detect(self, hsv, target):
+        """Return list (nama, bgr, luas, (x, y, w, h)) untuk semua blob warna target"""
+        compiled = self._compiled.get(target) or self._compile(target)
+        hue_lut, smin, vmin, smax, vmax, to_label, labels, check_upper = compiled
+        if not labels:
+            return []
+
+        h, s, v = cv2.split(hsv)
+        rid = cv2.LUT(h, hue_lut)
+        mask = cv2.compare(rid, 0, cv2.CMP_GT)
+        mask &= cv2.compare(s, cv2.LUT(rid, smin), cv2.CMP_GE)
+        mask &= cv2.compare(v, cv2.LUT(rid, vmin), cv2.CMP_GE)
+        if check_upper:
+            mask &= cv2.compare(s, cv2.LUT(rid, smax), cv2.CMP_LE)
+            mask &= cv2.compare(v, cv2.LUT(rid, vmax), cv2.CMP_LE)
+
+        dilated = cv2.dilate(mask, self.kernel)
+        contours, _ = cv2.findContours(dilated, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+        found = []
+        label_img = None
+        for contour in contours:
+            area = cv2.contourArea(contour)
+            if area <= self.min_area:
+                continue
+            x, y, w, h_box = cv2.boundingRect(contour)
+            if len(labels) == 1:
+                label_idx = labels[0]
+            else:
+                # Warna blob = label terbanyak di dalam kotaknya
+                if label_img is None:
+                    label_img = cv2.bitwise_and(cv2.LUT(rid, to_label), mask)
+                counts = np.bincount(label_img[y:y + h_box, x:x + w].ravel(), minlength=len(self.names))
+                counts[0] = 0
+                label_idx = int(counts.argmax())
+            found.append((self.names[label_idx], self.bgr[label_idx], area, (x, y, w, h_box)))
+        return found
+
+
+class AIBackends:
+    """
+    Model berat (TFLite + MediaPipe) milik SATU thread.
+    Interpreter & graph tidak thread-safe, jadi tiap worker punya instance sendiri.
+    Tiap backend dibuat saat pertama dipakai (atau lewat ensure()/prefetch),
+    jadi mode yang tidak pernah dipilih tidak memakan waktu startup & RAM.
+    """
+    def __init__(self, model_path, num_threads=TFLITE_NUM_THREADS, xnnpack=TFLITE_XNNPACK):
+        self.model_path = model_path
+        self.num_threads = num_threads
+        self.xnnpack = xnnpack
+        self._interpreter = None
+        self._face_detector = None
+        self._hands = None
+        self._qr_decode = None
+        self._loaded = set()          # Backend yang sudah dicoba dimuat (dan sudah warm-up)
+        self._lock = threading.RLock()
+        # Status per backend: cold -> warming -> hot (atau unavailable)
+        self.status = {name: "cold" for name in set(MODE_BACKENDS.values())}
+        self._ready = {name: threading.Event() for name in self.status}
+
+    # --- AKSES LAZY ---
+    @property
+    def interpreter(self):
+        if "ssd" not in self._loaded: self._load("ssd")
+        return self._interpreter
+
+    @property
+    def face_detector(self):
+        if "face" not in self._loaded: self._load("face")
+        return self._face_detector
+
+    @property
+    def hands(self):
+        if "hands" not in self._loaded: self._load("hands")
+        return self._hands
+
+    @property
+    def qr_decode(self):
+        if "qr" not in self._loaded: self._load("qr")
+        return self._qr_decode
+
+    def is_loaded(self, mode):
+        name = MODE_BACKENDS.get(mode)
+        return name is None or name in self._loaded
+
+    def wait_ready(self, mode, timeout=None):
+        """Blok sampai backend mode ini selesai dimuat + warm-up"""
+        name = MODE_BACKENDS.get(mode)
+        return name is None or self._ready[name].wait(timeout)
+
+    def configure_ssd(self, model_path, num_threads, xnnpack):
+        """Ganti model/engine SSD: interpreter lama dibuang, dimuat ulang saat dipakai"""
+        with self._lock:
+            self.model_path = model_path
+            self.num_threads = num_threads
+            self.xnnpack = xnnpack
+            self._interpreter = None
+            self._loaded.discard("ssd")
+            self.status["ssd"] = "cold"
+            self._ready["ssd"].clear()
+
+    def ensure(self, mode):
+        """Muat backend untuk mode ini sekarang (dipakai prefetch)"""
+        name = MODE_BACKENDS.get(mode)
+        if name is not None and name not in self._loaded:
+            self._load(name)
+
+    def _load(self, name):
+        with self._lock:
+            if name in self._loaded:
+                return
+            self.status[name] = "warming"
+            t0 = time.perf_counter()
+            try:
+                if name == "ssd":
+                    self._init_tflite()
+                elif name == "face":
+                    mp = lazy_import("mediapipe")
+                    self._face_detector = mp.solutions.face_detection.FaceDetection(min_detection_confidence=0.5)
+                elif name == "hands":
+                    mp = lazy_import("mediapipe")
+                    self._hands = mp.solutions.hands.Hands(max_num_hands=1, min_detection_confidence=0.5)
+                elif name == "qr":
+                    self._qr_decode = lazy_import("pyzbar.pyzbar").decode
+            except Exception as e:
+                # Gagal sekali saja (tidak dicoba ulang tiap frame), mode jadi no-op
+                print(f"[AI] Backend {name} tidak tersedia: {e}")
+            t_init = time.perf_counter() - t0
+
+            # Warm-up: inferensi pertama TFLite/MediaPipe jauh lebih lambat (alokasi lazy),
+            # jadi dibayar di sini, bukan di frame pertama setelah ganti mode
+            t1 = time.perf_counter()
+            ok = self._warmup(name)
+            t_warm = time.perf_counter() - t1
+
+            self._loaded.add(name)
+            self.status[name] = "hot" if ok else "unavailable"
+            self._ready[name].set()
+            STARTUP.add("init", name, t_init)
+            STARTUP.add("init", name + ".warmup", t_warm)
+            print(f"[AI] Backend {name} {self.status[name]} (init {t_init:.2f}s, warm-up {t_warm:.2f}s)")
+
+    def _warmup(self, name):
+        """Jalankan backend di frame sintetis. False jika backend tidak tersedia."""
+        frame = np.random.default_rng(0).integers(0, 255, (FRAME_HEIGHT, FRAME_WIDTH, 3), np.uint8)
+        try:
+            for _ in range(AI_WARMUP_RUNS):
+                if name == "ssd":
+                    if self._interpreter is None: return False
+                    self.run_ssd(frame)
+                elif name == "face":
+                    if self._face_detector is None: return False
+                    self._face_detector.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+                elif name == "hands":
+                    if self._hands is None: return False
+                    self._hands.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+                elif name == "qr":
+                    if self._qr_decode is None: return False
+                    self._qr_decode(frame)
+        except Exception as e:
+            # Backend yang gagal di frame sintetis dianggap tidak tersedia: objeknya
+            # dibuang agar thread AI tidak mengirim frame ke sana (mode jadi no-op)
+            print(f"[AI] Warm-up {name} gagal: {e}")
+            if name == "ssd": self._interpreter = None
+            elif name == "face": self._face_detector = None
+            elif name == "hands": self._hands = None
+            elif name == "qr": self._qr_decode = None
+            return False
+        return True
+
+    def _init_tflite(self):
+        tflite = load_tflite()
+        if tflite is not None and os.path.exists(self.model_path):
+            try:
+                self._interpreter = make_interpreter(tflite, self.model_path, self.num_threads, self.xnnpack)
+                self._interpreter.allocate_tensors()
+                self.input_details = self._interpreter.get_input_details()
+                self.output_details = self._interpreter.get_output_details()
+                self._init_ssd_buffers()
+                print("[AI] Model Loaded.")
+            except: self._interpreter = None
+
+    def _init_ssd_buffers(self):
+        """Buffer preprocessing dialokasikan sekali, dipakai ulang tiap frame"""
+        inp = self.input_details[0]
+        _, self.in_h, self.in_w, _ = inp['shape']
+        self.input_float = inp['dtype'] == np.float32
+        self.resized = np.empty((self.in_h, self.in_w, 3), np.uint8)
+        # Model int8: piksel uint8 dinormalisasi MobileNet ([-1, 1]) lalu dikuantisasi
+        # dengan scale/zero-point input -> tabel 256 entri, dipakai cv2.LUT (1 pass)
+        self.input_lut = None
+        if inp['dtype'] == np.int8:
+            scale, zero_point = inp['quantization']
+            real = np.arange(256, dtype=np.float32) / 127.5 - 1.0
+            q = np.round(real / (scale or 1.0 / 128)) + zero_point
+            self.input_lut = np.clip(q, -128, 127).astype(np.int8)
+        self.rgb = np.empty((self.in_h, self.in_w, 3), np.uint8) if (self.input_float or self.input_lut is not None) else None
+        # Output terkuantisasi (jarang untuk SSD postprocess) -> (scale, zero_point) untuk dequantize
+        self.output_quant = [
+            d['quantization'] if d['dtype'] != np.float32 else None for d in self.output_details[:3]
+        ]
+        # tensor() -> fungsi yang memberi view numpy ke buffer input interpreter (tanpa copy).
+        # View TIDAK boleh dipegang saat invoke(), jadi selalu diambil ulang per frame.
+        self.input_view = self._interpreter.tensor(inp['index'])
+        self.output_views = [self._interpreter.tensor(d['index']) for d in self.output_details[:3]]
+
+    def run_ssd(self, frame):
+        """
+        Preprocess langsung ke tensor input lalu invoke.
+        Return view (boxes, classes, scores); valid sampai invoke berikutnya.
+        """
+        cv2.resize(frame, (self.in_w, self.in_h), dst=self.resized)
+        tensor_in = self.input_view()[0]
+        if self.input_float:
+            # Model float: normalisasi ke [-1, 1] langsung ke tensor input
+            cv2.cvtColor(self.resized, cv2.COLOR_BGR2RGB, dst=self.rgb)
+            np.multiply(self.rgb, 1.0 / 127.5, out=tensor_in, casting="unsafe")
+            np.subtract(tensor_in, 1.0, out=tensor_in)
+        elif self.input_lut is not None:
+            # Model int8: kuantisasi lewat tabel langsung ke tensor input
+            cv2.cvtColor(self.resized, cv2.COLOR_BGR2RGB, dst=self.rgb)
+            cv2.LUT(self.rgb, self.input_lut, dst=tensor_in)
+        else:
+            cv2.cvtColor(self.resized, cv2.COLOR_BGR2RGB, dst=tensor_in)
+        del tensor_in
+
+        self._interpreter.invoke()
+        outputs = tuple(view()[0] for view in self.output_views)
+        if any(self.output_quant):
+            outputs = tuple(
+                out if q is None else (out.astype(np.float32) - q[1]) * q[0]
+                for out, q in zip(outputs, self.output_quant)
+            )
+        return outputs
+
 
 class AIProcessor:
     def __init__(self):
@@ -27,6 +420,24 @@ class AIProcessor:
         self.qr_data = None         
         self.gesture_data = None    
 
+        # Hasil terbaru (snapshot immutable) + notifikasi untuk yang menunggu
+        self.result = AIResult()
+        self.result_cond = threading.Condition()
+        self.notifier = AsyncNotifier()  # Bangunkan loop kontrol async (main.py)
+        self._prev_found = None  # Hasil "found" sebelumnya (untuk ekstrapolasi gerak)
+        self.stale_rejects = 0   # Hasil ditolak current() karena lebih tua dari AI_MAX_RESULT_AGE
+
+        # --- ROI TRACKING (cari hanya di sekitar target terakhir) ---
+        self.roi_tracking = False
+        self._roi_box = None     # Box target terakhir (koordinat frame penuh)
+        self._roi_misses = 0
+
+        # --- HYBRID DETECT-THEN-TRACK (wajah & objek) ---
+        self.hybrid_tracking = False
+        self._tracker = None
+        self._tracker_init_box = None
+        self._tracker_frames = 0  # Frame sejak deteksi terakhir
+
         # --- VISUALISASI DEADZONE ---
         self.show_deadzone = False
         self.deadzone_x_val = 0.0
@@ -35,46 +446,159 @@ class AIProcessor:
         # --- TAMBAHAN BARU: VISUALISASI JARAK (HUD) ---
         self.distance_val = None 
 
-        # Setup Model SSD MobileNet (Objek)
-        self.model_path = "assets/ssd_mobilenet_v2.tflite"
-        self.interpreter = None
+        # Setup Model SSD MobileNet (Objek): varian dari registry TFLITE_MODELS
+        self.num_threads = tflite_threads(TFLITE_NUM_THREADS)
+        self.xnnpack = TFLITE_XNNPACK
+        self.model_name, self.model_path = self.resolve_model(TFLITE_MODEL)
         self.labels = {
             0: "person", 1: "bicycle", 2: "car", 3: "motorcycle", 
             44: "bottle", 46: "cup", 62: "chair", 63: "couch", 
             64: "potted plant", 67: "dining table", 76: "cell phone"
         }
         self.TARGET_OBJECTS = ["person", "car", "motorcycle", "bottle", "cup", "cell phone"]
-        self._init_tflite()
+        self.SCORE_THRESHOLD = 0.5
+        # Lookup class id -> apakah termasuk TARGET_OBJECTS (filter vektor)
+        self.target_lut = np.zeros(256, bool)
+        for class_id, label in self.labels.items():
+            if label in self.TARGET_OBJECTS:
+                self.target_lut[class_id] = True
+        self.hand_links = None  # Diisi saat gesture pertama kali jalan (butuh mediapipe)
+        self.color_labeler = ColorLabeler(COLOR_TABLE, COLOR_MIN_AREA)
 
-        # Setup MediaPipe (Wajah & Tangan)
-        self.mp_face = mp.solutions.face_detection
-        self.face_detector = self.mp_face.FaceDetection(min_detection_confidence=0.5)
-        self.mp_hands = mp.solutions.hands
-        self.hands = self.mp_hands.Hands(max_num_hands=1, min_detection_confidence=0.5)
-        self.mp_draw = mp.solutions.drawing_utils
+        # Semua set model (thread AI utama + worker pool), untuk prefetch & status siap
+        self.backend_sets = []
+        self._sets_lock = threading.Lock()
+        # Model untuk jalur serial (thread AI utama)
+        self.backends = self.create_backends()
+        # AIProcessClient jika inferensi jalan di proses terpisah (AI_OUT_OF_PROCESS):
+        # model dimuat di proses anak, prefetch & status siap diteruskan ke sana
+        self.remote = None
 
-    def _init_tflite(self):
-        if os.path.exists(self.model_path):
-            try:
-                self.interpreter = tflite.Interpreter(model_path=self.model_path)
-                self.interpreter.allocate_tensors()
-                self.input_details = self.interpreter.get_input_details()
-                self.output_details = self.interpreter.get_output_details()
-                print("[AI] Model Loaded.")
-            except: pass
+    @staticmethod
+    def resolve_model(name):
+        """(nama, path) dari registry; fallback ke varian pertama yang file-nya ada"""
+        path = TFLITE_MODELS.get(name)
+        if path and os.path.exists(path):
+            return name, path
+        for other, other_path in TFLITE_MODELS.items():
+            if os.path.exists(other_path):
+                print(f"[AI] Model {name} tidak ada, pakai {other}")
+                return other, other_path
+        return name, path or ""
+
+    def select_model(self, name=None, num_threads=None, xnnpack=None):
+        """
+        Ganti varian model / thread / XNNPACK saat jalan (dimuat ulang di latar).
+        Varian yang file-nya tidak ada -> FileNotFoundError (tidak diam-diam fallback).
+        """
+        if name is not None:
+            path = TFLITE_MODELS.get(name)
+            if not path or not os.path.exists(path):
+                available = [n for n, p in TFLITE_MODELS.items() if os.path.exists(p)]
+                raise FileNotFoundError(f"Model {name} tidak ada ({path}), tersedia: {available}")
+            self.model_name, self.model_path = name, path
+        if num_threads is not None: self.num_threads = tflite_threads(num_threads)
+        if xnnpack is not None: self.xnnpack = xnnpack
+        with self._sets_lock:
+            sets = list(self.backend_sets)
+        for be in sets:
+            be.configure_ssd(self.model_path, self.num_threads, self.xnnpack)
+        if self.mode == "object_detection":
+            self.prefetch(self.mode)
+        print(f"[AI] Model: {self.model_name} (threads {self.num_threads}, xnnpack {self.xnnpack})")
+        return self.model_info()
+
+    def model_info(self):
+        return {"model": self.model_name, "path": self.model_path,
+                "num_threads": self.num_threads, "xnnpack": self.xnnpack}
+
+    def create_backends(self):
+        """Set model baru (untuk worker pool: 1 set per thread). Model dimuat lazy."""
+        be = AIBackends(self.model_path, self.num_threads, self.xnnpack)
+        with self._sets_lock:
+            self.backend_sets.append(be)
+        return be
+
+    def release_backends(self, be):
+        with self._sets_lock:
+            if be in self.backend_sets: self.backend_sets.remove(be)
+
+    def prefetch(self, *modes):
+        """Muat + warm-up backend mode-mode ini di thread latar (semua set model)"""
+        remote = self.remote
+        if remote is not None:
+            return remote.prefetch(*modes)
+        with self._sets_lock:
+            sets = list(self.backend_sets)
+        todo = [(be, m) for be in sets for m in modes if not be.is_loaded(m)]
+        if not todo:
+            return None
+        def run():
+            for be, m in todo:
+                be.ensure(m)
+        t = threading.Thread(target=run, name="ai-prefetch", daemon=True)
+        t.start()
+        return t
+
+    def is_ready(self, mode=None):
+        """True jika backend mode ini sudah dimuat & warm-up di semua set model"""
+        mode = self.mode if mode is None else mode
+        remote = self.remote
+        if remote is not None:
+            return remote.is_ready(mode)
+        with self._sets_lock:
+            sets = list(self.backend_sets)
+        return all(be.is_loaded(mode) for be in sets)
+
+    def wait_ready(self, mode=None, timeout=None):
+        """Blok (thread) sampai mode siap. Dipanggil lewat asyncio.to_thread dari main.py."""
+        mode = self.mode if mode is None else mode
+        remote = self.remote
+        if remote is not None:
+            return remote.wait_ready(mode, timeout)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._sets_lock:
+            sets = list(self.backend_sets)
+        for be in sets:
+            sisa = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not be.wait_ready(mode, sisa):
+                return False
+        return True
+
+    def mode_status(self):
+        """Status untuk UI: off / warming / active (+ status tiap backend)"""
+        if self.mode == "off":
+            state = "off"
+        else:
+            state = "active" if self.is_ready() else "warming"
+        remote = self.remote
+        backends = dict(remote.status) if remote is not None else dict(self.backends.status)
+        status = {"mode": self.mode, "status": state, "backends": backends, "ssd": self.model_info()}
+        if remote is not None:
+            status["process"] = remote.stats()
+        return status
 
     def set_mode(self, mode):
         self.mode = mode
+        # Mulai muat backend mode ini di latar (set_mode dipanggil dari event loop, jangan blok)
+        self.prefetch(mode)
         self.qr_data = None
         self.gesture_data = None
         self.object_found = False
         self.track_area = 0.0
         self.track_error_x = 0.0
         self.track_error_y = 0.0
+        with self.result_cond:
+            self.result = AIResult(mode)
+            self._prev_found = None
+            self._roi_box = None
+            self._roi_misses = 0
+            self._tracker = None
         
         # Matikan deadzone visual saat ganti mode (kecuali dinyalakan lagi oleh main.py)
         if mode == "off":
             self.show_deadzone = False
+        self.notifier.notify()
             
         print(f"[AI] Mode: {self.mode}")
 
@@ -82,6 +606,17 @@ class AIProcessor:
         self.target_color = color_name.lower() 
         print(f"[AI] Target Color: {self.target_color}")
 
+    def set_roi_tracking(self, active):
+        """Aktifkan pencarian di sekitar target terakhir (mode color & face)"""
+        self.roi_tracking = active
+        self._roi_box = None
+        self._roi_misses = 0
+
+    def set_hybrid_tracking(self, active):
+        """Detektor tiap TRACKER_REDETECT_EVERY frame, tracker OpenCV di antaranya"""
+        self.hybrid_tracking = active
+        self._tracker = None
+
     def set_deadzone(self, active, x=0.0, y=0.0):
         """Mengaktifkan visualisasi kotak Deadzone di layar"""
         self.show_deadzone = active
@@ -94,25 +629,151 @@ class AIProcessor:
         self.distance_val = dist
     # --------------------------------------
 
+    # --- PIPELINE: ANALYZE -> PUBLISH -> DRAW ---
+
+    def analyze(self, frame, seq=0, frame_ts=0.0, backends=None):
+        """
+        Jalankan AI sesuai mode. Tidak menggambar & tidak mengubah frame.
+        `backends` diisi oleh worker pool; default pakai model milik thread utama.
+        """
+        t_start = time.monotonic()
+        mode = self.mode
+        result = AIResult(mode, seq, frame_ts)
+        be = backends or self.backends
+
+        if mode == "off": pass
+        elif mode == "object_detection": self._detect_or_track(frame, result, self._process_ssd_mobilenet, frame, result, be)
+        elif mode == "face_detection": self._detect_or_track(frame, result, self._track_roi, self._process_face, frame, result, be)
+        elif mode == "gesture_recognition": self._process_gesture(frame, result, be)
+        elif mode == "color_detection": self._track_roi(self._process_color, frame, result)
+        elif mode == "qr_recognition": self._process_qr(frame, result, be)
+        elif mode == "auto_pilot": self._process_auto_pilot(frame, result)
+
+        result.ts = time.monotonic()
+        result.latency = result.ts - t_start
+        # Span per mode = durasi _process_* (termasuk ROI/tracker di sekitarnya)
+        if mode != "off": LATENCY.record("ai." + mode, result.latency)
+        return result
+
+    def publish(self, result):
+        """Jadikan result sebagai hasil terbaru & bangunkan yang menunggu"""
+        with self.result_cond:
+            # Hasil dari mode lama (mode diganti saat inferensi) dibuang
+            if result.mode != self.mode:
+                return False
+            prev = self.result
+            if prev.object_found and prev.mode == result.mode:
+                self._prev_found = prev
+            self.result = result
+            # Atribut lama tetap diisi agar kode lama tetap jalan
+            self.track_error_x = result.error_x
+            self.track_error_y = result.error_y
+            self.object_found = result.object_found
+            if result.object_found and result.area:
+                self.track_area = result.area
+            if result.mode == "qr_recognition":
+                self.qr_data = result.qr_data
+            if result.mode == "gesture_recognition":
+                self.gesture_data = result.gesture
+            self.result_cond.notify_all()
+        self.notifier.notify()
+        return True
+
+    def wait_result(self, last_seq, timeout=1.0):
+        """Blok sampai ada result dengan seq > last_seq (untuk thread lain)"""
+        with self.result_cond:
+            self.result_cond.wait_for(lambda: self.result.seq > last_seq, timeout)
+            return self.result
+
+    def current(self, now=None, max_age=AI_MAX_RESULT_AGE):
+        """
+        Hasil untuk loop kontrol. Di antara dua inferensi (frame yang dilewati
+        scheduler), error_x/y & box diekstrapolasi dari kecepatan target.
+        Hasil yang frame sumbernya lebih tua dari max_age ditolak: dikembalikan
+        sebagai "tidak ada target" (seq/frame_ts tetap, untuk tracing).
+        """
+        res = self.result
+        now = time.monotonic() if now is None else now
+        if max_age and res.age(now) > max_age:
+            self.stale_rejects += 1
+            return AIResult(res.mode, res.seq, res.frame_ts)
+
+        prev = self._prev_found
+        if not AI_EXTRAPOLATE or not res.object_found or prev is None or res.frame_ts <= 0:
+            return res
+        dt = res.frame_ts - prev.frame_ts
+        if dt <= 0 or dt > AI_EXTRAPOLATE_MAX:
+            return res
+
+        horizon = min(now - res.frame_ts, AI_EXTRAPOLATE_MAX)
+        if horizon <= 0:
+            return res
+
+        k = horizon / dt
+        pred = AIResult(res.mode, res.seq, res.frame_ts)
+        pred.ts = res.ts
+        pred.latency = res.latency
+        pred.object_found = True
+        pred.area = res.area
+        pred.qr_data = res.qr_data
+        pred.gesture = res.gesture
+        pred.shapes = res.shapes
+        pred.error_x = max(-1.0, min(1.0, res.error_x + (res.error_x - prev.error_x) * k))
+        pred.error_y = max(-1.0, min(1.0, res.error_y + (res.error_y - prev.error_y) * k))
+        if res.box is not None and prev.box is not None:
+            x, y, w, h = res.box
+            pred.box = (int(x + (x - prev.box[0]) * k), int(y + (y - prev.box[1]) * k), w, h)
+        return pred
+
     def process_frame(self, frame):
-        # Reset data per frame
-        self.track_error_x = 0.0
-        self.track_error_y = 0.0
-        self.object_found = False
-        
-        # 1. Proses Utama sesuai Mode
-        processed_frame = frame
-        if self.mode == "off": pass
-        elif self.mode == "object_detection": processed_frame = self._process_ssd_mobilenet(frame)
-        elif self.mode == "face_detection": processed_frame = self._process_face(frame)
-        elif self.mode == "gesture_recognition": processed_frame = self._process_gesture(frame)
-        elif self.mode == "color_detection": processed_frame = self._process_color(frame)
-        elif self.mode == "qr_recognition": processed_frame = self._process_qr(frame)
-        elif self.mode == "auto_pilot": processed_frame = self._process_auto_pilot(frame)
+        """Versi lama (sinkron): analyze + publish + gambar overlay di frame"""
+        result = self.analyze(frame)
+        self.publish(result)
+        return self.draw_overlay(frame, result)
+
+    def has_overlay(self, result):
+        """Ada yang perlu digambar? Jika tidak, frame annotated == frame clean"""
+        return bool(result.shapes) or self.show_deadzone or self.distance_val is not None
+
+    def overlay_state(self, result):
+        """
+        Geometri overlay tanpa menggambar (untuk dirender di client,
+        dikirim lewat /ws/telemetry bersama stream ?overlay=clean).
+        Koordinat dalam piksel frame (FRAME_WIDTH x FRAME_HEIGHT).
+        """
+        return {
+            "ov.seq": result.seq,
+            "ov.shapes": result.shapes,
+            "ov.deadzone": (self.deadzone_x_val, self.deadzone_y_val) if self.show_deadzone else None,
+            "ov.dist": self.distance_val,
+        }
+
+    def draw_overlay(self, frame, result):
+        """Gambar hasil AI + deadzone + HUD jarak langsung di frame (in-place)"""
+        # 1. Geometri dari hasil AI
+        for s in result.shapes:
+            kind = s["type"]
+            if kind == "rect":
+                x, y, w, h = s["box"]
+                cv2.rectangle(frame, (x, y), (x + w, y + h), s["color"], s.get("thick", 2))
+            elif kind == "text":
+                cv2.putText(frame, s["text"], tuple(s["pos"]), cv2.FONT_HERSHEY_SIMPLEX, s["scale"], s["color"], s.get("thick", 2))
+            elif kind == "line":
+                (x1, y1), (x2, y2) = s["pts"]
+                cv2.line(frame, (x1, y1), (x2, y2), s["color"], s.get("thick", 2))
+            elif kind == "poly":
+                pts = np.array(s["pts"], np.int32).reshape((-1, 1, 2))
+                cv2.polylines(frame, [pts], True, s["color"], s.get("thick", 3))
+            elif kind == "hand":
+                pts = s["pts"]
+                for a, b in s["links"]:
+                    cv2.line(frame, tuple(pts[a]), tuple(pts[b]), (224, 224, 224), 2)
+                for p in pts:
+                    cv2.circle(frame, tuple(p), 2, (0, 0, 255), 2)
 
         # 2. Gambar Overlay Deadzone (Jika Aktif)
         if self.show_deadzone:
-            h, w, _ = processed_frame.shape
+            h, w, _ = frame.shape
             cx, cy = w // 2, h // 2
             
             # Hitung ukuran kotak
@@ -123,11 +784,11 @@ class AIProcessor:
             pt2 = (cx + span_x, cy + span_y)
             
             # Gambar Kotak Cyan (Biru Muda)
-            cv2.rectangle(processed_frame, pt1, pt2, (255, 255, 0), 2)
+            cv2.rectangle(frame, pt1, pt2, (255, 255, 0), 2)
             
             # Gambar Crosshair Merah Kecil di Tengah
-            cv2.line(processed_frame, (cx - 10, cy), (cx + 10, cy), (0, 0, 255), 1)
-            cv2.line(processed_frame, (cx, cy - 10), (cx, cy + 10), (0, 0, 255), 1)
+            cv2.line(frame, (cx - 10, cy), (cx + 10, cy), (0, 0, 255), 1)
+            cv2.line(frame, (cx, cy - 10), (cx, cy + 10), (0, 0, 255), 1)
 
         # 3. Overlay Distance (BARU - Pojok Kiri Atas)
         if self.distance_val is not None:
@@ -136,112 +797,199 @@ class AIProcessor:
             text = f"DIST: {self.distance_val:.1f} cm"
             
             # Background Hitam Transparan (Agar tulisan terbaca)
-            cv2.rectangle(processed_frame, (5, 5), (220, 40), (0, 0, 0), -1) 
+            cv2.rectangle(frame, (5, 5), (220, 40), (0, 0, 0), -1) 
             # Tulisan
-            cv2.putText(processed_frame, text, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, color, 2)
+            cv2.putText(frame, text, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, color, 2)
 
-        return processed_frame
+        return frame
+
+    # --- ROI TRACKING ---
+
+    def _roi_window(self, w_img, h_img):
+        """Jendela pencarian (x0, y0, x1, y1) di sekitar box terakhir, None = full frame"""
+        box = self._roi_box
+        if box is None:
+            return None
+        x, y, w, h = box
+        half_w = max(ROI_MIN_SIZE, int(w * ROI_EXPAND)) // 2
+        half_h = max(ROI_MIN_SIZE, int(h * ROI_EXPAND)) // 2
+        cx, cy = x + w // 2, y + h // 2
+        x0, y0 = max(0, cx - half_w), max(0, cy - half_h)
+        x1, y1 = min(w_img, cx + half_w), min(h_img, cy + half_h)
+        if x1 - x0 < 16 or y1 - y0 < 16:
+            return None
+        return (x0, y0, x1, y1)
+
+    def _track_roi(self, process, frame, result, *args):
+        """
+        Jalankan detektor hanya di jendela sekitar target terakhir.
+        Kembali ke full frame setelah ROI_MAX_MISSES kali gagal berturut-turut.
+        Hasil (box, error, area) tetap dalam koordinat frame penuh.
+        """
+        h_img, w_img = frame.shape[:2]
+        window = self._roi_window(w_img, h_img) if self.roi_tracking else None
+
+        if window is None:
+            process(frame, result, *args)
+        else:
+            x0, y0, x1, y1 = window
+            process(frame[y0:y1, x0:x1], result, *args, origin=(x0, y0), full=(w_img, h_img))
+            result.shapes.append({"type": "rect", "box": (x0, y0, x1 - x0, y1 - y0), "color": (128, 128, 128), "thick": 1})
+
+        if not self.roi_tracking:
+            return
+        if result.object_found:
+            self._roi_box = result.box
+            self._roi_misses = 0
+        elif window is not None:
+            self._roi_misses += 1
+            if self._roi_misses >= ROI_MAX_MISSES:
+                self._roi_box = None
+                self._roi_misses = 0
+
+    # --- HYBRID DETECT-THEN-TRACK ---
+
+    def _detect_or_track(self, frame, result, detect, *args):
+        """
+        Jika hybrid_tracking aktif: pakai tracker murah selama masih yakin,
+        detektor mahal hanya tiap TRACKER_REDETECT_EVERY frame atau saat tracker goyah.
+        """
+        if not self.hybrid_tracking:
+            detect(*args)
+            return
+
+        h_img, w_img = frame.shape[:2]
+        tracker = self._tracker
+        if tracker is not None and self._tracker_frames < TRACKER_REDETECT_EVERY:
+            t0 = time.perf_counter()
+            ok, box = tracker.update(frame)
+            LATENCY.record("tracker.update", time.perf_counter() - t0)
+            if ok and self._tracker_confident(box, w_img, h_img):
+                x, y, w, h = (int(v) for v in box)
+                self._tracker_frames += 1
+                result.shapes.append({"type": "rect", "box": (x, y, w, h), "color": (255, 128, 0)})
+                result.shapes.append({"type": "text", "pos": (x, y - 5), "text": "TRACK", "scale": 0.5, "color": (255, 128, 0)})
+                result.set_target(x, y, w, h, w_img, h_img)
+                result.area = (w * h) / (w_img * h_img)
+                result.tracked = True
+                result.tracker_next = self._tracker_frames < TRACKER_REDETECT_EVERY
+                if self.roi_tracking:
+                    # Jendela ROI ikut posisi tracker, jadi deteksi ulang mencari di posisi terbaru
+                    self._roi_box = result.box
+                    self._roi_misses = 0
+                return
+
+        # Deteksi ulang (jadwal rutin / tracker hilang)
+        self._tracker = None
+        detect(*args)
+        if result.object_found and result.box is not None:
+            tracker = create_tracker(TRACKER_TYPE)
+            if tracker is not None:
+                tracker.init(frame, tuple(int(v) for v in result.box))
+                self._tracker = tracker
+                self._tracker_init_box = result.box
+                self._tracker_frames = 0
+                result.tracker_next = TRACKER_REDETECT_EVERY > 0
+
+    def _tracker_confident(self, box, w_img, h_img):
+        """Tracker dianggap goyah jika box keluar frame atau ukurannya berubah drastis"""
+        x, y, w, h = box
+        if w <= 0 or h <= 0 or x + w <= 0 or y + h <= 0 or x >= w_img or y >= h_img:
+            return False
+        _, _, w0, h0 = self._tracker_init_box
+        scale = (w * h) / max(1, w0 * h0)
+        return (1.0 / TRACKER_MAX_SCALE) <= scale <= TRACKER_MAX_SCALE
 
     # --- LOGIKA MODUL AI ---
+    # Semua _process_* hanya mengisi `result` (data + geometri overlay)
 
-    def _process_color(self, frame):
+    def _process_color(self, frame, result, origin=(0, 0), full=None):
         if self.target_color == "none":
-            cv2.putText(frame, "SELECT COLOR", (180, 240), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
-            return frame
+            result.shapes.append({"type": "text", "pos": (180, 240), "text": "SELECT COLOR", "scale": 1, "color": (255, 255, 255)})
+            return
 
         hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-        
-        color_definitions = [
-            {"label": "red", "lower": np.array([0, 160, 100]), "upper": np.array([10, 255, 255]), "bgr": (0, 0, 255)},
-            {"label": "red", "lower": np.array([170, 160, 100]), "upper": np.array([180, 255, 255]), "bgr": (0, 0, 255)},
-            {"label": "blue", "lower": np.array([110, 180, 60]), "upper": np.array([130, 255, 255]), "bgr": (255, 0, 0)},
-            {"label": "green", "lower": np.array([40, 70, 70]), "upper": np.array([80, 255, 255]), "bgr": (0, 255, 0)},
-            {"label": "yellow", "lower": np.array([20, 100, 100]), "upper": np.array([35, 255, 255]), "bgr": (0, 255, 255)}
-        ]
-
-        kernel = np.ones((5,5), "uint8")
         max_area = 0
-        best_contour = None
-        
-        for color in color_definitions:
-            # Filter warna (Skip jika bukan target & target bukan "all")
-            if self.target_color != "all" and color["label"] != self.target_color:
-                continue 
-
-            mask = cv2.inRange(hsv, color["lower"], color["upper"])
-            mask = cv2.dilate(mask, kernel) 
-            contours, _ = cv2.findContours(mask, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
-            
-            for contour in contours:
-                area = cv2.contourArea(contour)
-                if area > 800:
-                    x, y, w, h = cv2.boundingRect(contour)
-                    cv2.rectangle(frame, (x, y), (x + w, y + h), color["bgr"], 2)
-                    cv2.putText(frame, color["label"].upper(), (x, y - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color["bgr"], 2)
-                    
-                    if area > max_area:
-                        max_area = area
-                        best_contour = contour
+        best_box = None
+
+        ox, oy = origin
+        for label, bgr, area, (x, y, w, h) in self.color_labeler.detect(hsv, self.target_color):
+            x, y = x + ox, y + oy
+            result.shapes.append({"type": "rect", "box": (x, y, w, h), "color": bgr})
+            result.shapes.append({"type": "text", "pos": (x, y - 5), "text": label.upper(), "scale": 0.5, "color": bgr})
+            if area > max_area:
+                max_area = area
+                best_box = (x, y, w, h)
         
         # Hitung Error untuk Tracking Servo
-        if best_contour is not None:
-            x, y, w, h = cv2.boundingRect(best_contour)
-            h_img, w_img, _ = frame.shape
-            cx = x + (w // 2)
-            cy = y + (h // 2)
-            
-            self.track_error_x = (cx - (w_img / 2)) / (w_img / 2)
-            self.track_error_y = (cy - (h_img / 2)) / (h_img / 2)
-            self.track_area = max_area / (w_img * h_img)
-            self.object_found = True
+        if best_box is not None:
+            x, y, w, h = best_box
+            w_img, h_img = full or (frame.shape[1], frame.shape[0])
+            result.set_target(x, y, w, h, w_img, h_img)
+            result.area = max_area / (w_img * h_img)
 
-        return frame
-
-    def _process_face(self, frame):
+    def _process_face(self, frame, result, be, origin=(0, 0), full=None):
+        detector = be.face_detector
+        if detector is None: return
         rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.face_detector.process(rgb)
+        results = detector.process(rgb)
         if results.detections:
+            ox, oy = origin
+            h, w, c = frame.shape
+            w_img, h_img = full or (w, h)
             for detection in results.detections:
                 bboxC = detection.location_data.relative_bounding_box
-                h, w, c = frame.shape
-                x, y = int(bboxC.xmin * w), int(bboxC.ymin * h)
+                x, y = int(bboxC.xmin * w) + ox, int(bboxC.ymin * h) + oy
                 width, height = int(bboxC.width * w), int(bboxC.height * h)
-                cv2.rectangle(frame, (x, y), (x + width, y + height), (0, 255, 255), 2)
-                cx = x + (width // 2)
-                cy = y + (height // 2)
-                self.track_error_x = (cx - (w / 2)) / (w / 2)
-                self.track_error_y = (cy - (h / 2)) / (h / 2)
-                self.object_found = True
-        return frame
+                result.shapes.append({"type": "rect", "box": (x, y, width, height), "color": (0, 255, 255)})
+                result.set_target(x, y, width, height, w_img, h_img)
 
-    def _process_ssd_mobilenet(self, frame):
-        if not self.interpreter: return frame
+    def filter_ssd(self, boxes, classes, scores, w_img, h_img):
+        """Threshold skor + filter label secara vektor. Return list (label, score, box)."""
+        class_ids = classes.astype(np.int32)
+        keep = (scores > self.SCORE_THRESHOLD) & self.target_lut[np.clip(class_ids, 0, 255)]
+        idx = np.flatnonzero(keep)
+        if idx.size == 0:
+            return []
+
+        # [ymin, xmin, ymax, xmax] ternormalisasi -> piksel
+        b = boxes[idx] * np.array([h_img, w_img, h_img, w_img], np.float32)
+        x = b[:, 1].astype(np.int32)
+        y = b[:, 0].astype(np.int32)
+        w = (b[:, 3] - b[:, 1]).astype(np.int32)
+        h = (b[:, 2] - b[:, 0]).astype(np.int32)
+        return [
+            (self.labels[int(class_ids[i])], float(scores[i]), (int(x[k]), int(y[k]), int(w[k]), int(h[k])))
+            for k, i in enumerate(idx)
+        ]
+
+    def _process_ssd_mobilenet(self, frame, result, be):
+        if not be.interpreter: return
         h_img, w_img, _ = frame.shape
-        frame_resized = cv2.resize(frame, (300, 300))
-        input_data = np.expand_dims(cv2.cvtColor(frame_resized, cv2.COLOR_BGR2RGB), axis=0)
-        self.interpreter.set_tensor(self.input_details[0]['index'], input_data)
-        self.interpreter.invoke()
-        boxes = self.interpreter.get_tensor(self.output_details[0]['index'])[0] 
-        classes = self.interpreter.get_tensor(self.output_details[1]['index'])[0]
-        scores = self.interpreter.get_tensor(self.output_details[2]['index'])[0]
-        for i in range(len(scores)):
-            if scores[i] > 0.5:
-                label = self.labels.get(int(classes[i]), "unknown")
-                if label in self.TARGET_OBJECTS:
-                    ymin, xmin, ymax, xmax = boxes[i]
-                    x, y = int(xmin * w_img), int(ymin * h_img)
-                    w, h = int((xmax - xmin) * w_img), int((ymax - ymin) * h_img)
-                    cv2.rectangle(frame, (x, y), (x+w, y+h), (0, 255, 0), 2)
-                    cv2.putText(frame, f"{label} {int(scores[i]*100)}%", (x, y-10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
-        return frame
+        boxes, classes, scores = be.run_ssd(frame)
+        best_score = 0.0
+        for label, score, (x, y, w, h) in self.filter_ssd(boxes, classes, scores, w_img, h_img):
+            result.shapes.append({"type": "rect", "box": (x, y, w, h), "color": (0, 255, 0)})
+            result.shapes.append({"type": "text", "pos": (x, y - 10), "text": f"{label} {int(score*100)}%", "scale": 0.6, "color": (0, 255, 0)})
+            # Target tracking = deteksi dengan skor tertinggi
+            if score > best_score:
+                best_score = score
+                result.set_target(x, y, w, h, w_img, h_img)
+                result.area = (w * h) / (w_img * h_img)
 
-    def _process_gesture(self, frame):
+    def _process_gesture(self, frame, result, be):
+        hands = be.hands
+        if hands is None: return
+        if self.hand_links is None:
+            mp = lazy_import("mediapipe")
+            self.hand_links = [tuple(c) for c in mp.solutions.hands.HAND_CONNECTIONS]
         rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        res = self.hands.process(rgb)
-        self.gesture_data = None 
+        res = hands.process(rgb)
         if res.multi_hand_landmarks:
+            h, w, _ = frame.shape
             for hand_landmarks, hand_info in zip(res.multi_hand_landmarks, res.multi_handedness):
-                self.mp_draw.draw_landmarks(frame, hand_landmarks, self.mp_hands.HAND_CONNECTIONS)
+                pts = [(int(lm.x * w), int(lm.y * h)) for lm in hand_landmarks.landmark]
+                result.shapes.append({"type": "hand", "pts": pts, "links": self.hand_links})
                 fingers = []
                 # Jempol
                 if hand_landmarks.landmark[4].x < hand_landmarks.landmark[3].x: fingers.append(1)
@@ -251,25 +999,24 @@ class AIProcessor:
                     if hand_landmarks.landmark[id].y < hand_landmarks.landmark[id - 2].y: fingers.append(1)
                     else: fingers.append(0)
                 total = fingers.count(1)
-                self.gesture_data = total
-                cv2.putText(frame, f"Fingers: {total}", (10, 50), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+                result.gesture = total
+                result.shapes.append({"type": "text", "pos": (10, 50), "text": f"Fingers: {total}", "scale": 1, "color": (0, 255, 0)})
                 if total == 5: 
-                    cv2.putText(frame, "STOP", (200, 100), cv2.FONT_HERSHEY_SIMPLEX, 2, (0,0,255), 4)
-                    self.object_found = True 
-        return frame
+                    result.shapes.append({"type": "text", "pos": (200, 100), "text": "STOP", "scale": 2, "color": (0, 0, 255), "thick": 4})
+                    result.object_found = True 
 
-    def _process_qr(self, frame):
+    def _process_qr(self, frame, result, be):
+        decode = be.qr_decode
+        if decode is None: return
         decoded = decode(frame)
-        self.qr_data = None 
         for obj in decoded:
             data = obj.data.decode('utf-8')
-            self.qr_data = data 
-            pts = np.array([obj.polygon], np.int32).reshape((-1, 1, 2))
-            cv2.polylines(frame, [pts], True, (255, 0, 255), 3)
-            cv2.putText(frame, data, (obj.rect.left, obj.rect.top), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 0), 2)
-        return frame
+            result.qr_data = data 
+            pts = [(int(p.x), int(p.y)) for p in obj.polygon]
+            result.shapes.append({"type": "poly", "pts": pts, "color": (255, 0, 255), "thick": 3})
+            result.shapes.append({"type": "text", "pos": (obj.rect.left, obj.rect.top), "text": data, "scale": 0.8, "color": (0, 255, 0)})
 
-    def _process_auto_pilot(self, frame):
+    def _process_auto_pilot(self, frame, result):
         h, w, _ = frame.shape
         roi_h = int(h / 3) 
         roi = frame[h - roi_h:h, 0:w]
@@ -284,7 +1031,6 @@ class AIProcessor:
                 if M['m00'] != 0:
                     cx = int(M['m10'] / M['m00'])
                     global_cy = int(M['m01'] / M['m00']) + (h - roi_h)
-                    cv2.line(frame, (int(w/2), global_cy), (cx, global_cy), (0, 255, 255), 2)
-                    self.track_error_x = (cx - (w / 2)) / (w / 2)
-                    self.object_found = True
-        return frame
\ No newline at end of file
+                    result.shapes.append({"type": "line", "pts": ((int(w/2), global_cy), (cx, global_cy)), "color": (0, 255, 255)})
+                    result.error_x = (cx - (w / 2)) / (w / 2)
+                    result.object_found = True
@@ -0,0 +1,82 @@
+# modules/ai_pool.py
+import threading
+import queue
+from collections import deque
+
+
+class AIWorkerPool:
+    """
+    Inferensi pipelined untuk mode berat (SSD, wajah, gesture).
+    N thread worker, masing-masing punya AIBackends sendiri (interpreter/graph),
+    memproses frame berurutan secara paralel. Hasil diurutkan ulang
+    berdasarkan seq sebelum dipublish, jadi loop tracking tetap dapat urutan benar.
+    """
+    def __init__(self, ai, workers, on_result=None):
+        self.ai = ai
+        self.workers = workers
+        self.on_result = on_result  # Callback per hasil (mis. scheduler.record)
+        self.tasks = queue.Queue()
+        self.slots = threading.Semaphore(workers)  # Maks frame yang sedang diproses
+        self.lock = threading.Lock()
+        self.order = deque()  # seq yang sudah dikirim ke worker, urut
+        self.done = {}        # seq -> AIResult (None jika gagal)
+        self.threads = []
+        self.running = False
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        for i in range(self.workers):
+            t = threading.Thread(target=self._worker, args=(i,), name=f"ai-pool-{i}", daemon=True)
+            t.start()
+            self.threads.append(t)
+        print(f"[AI] Worker pool started ({self.workers} workers)")
+
+    def stop(self):
+        self.running = False
+        for _ in self.threads:
+            self.tasks.put(None)
+        for t in self.threads:
+            t.join(timeout=2.0)
+        self.threads = []
+
+    def submit(self, frame, timeout=1.0):
+        """Kirim frame ke worker bebas. Blok sampai ada slot; False jika timeout."""
+        if not self.slots.acquire(timeout=timeout):
+            return False
+        with self.lock:
+            self.order.append(frame.seq)
+        # Worker memegang frame sampai analyze selesai (buffer tidak dipakai ulang capture)
+        self.tasks.put(frame.acquire())
+        return True
+
+    def _worker(self, idx):
+        backends = self.ai.create_backends()
+        # Set model worker ikut dipanaskan untuk mode yang sedang aktif
+        self.ai.prefetch(self.ai.mode)
+        while self.running:
+            frame = self.tasks.get()
+            if frame is None:
+                break
+            result = None
+            try:
+                result = self.ai.analyze(frame.image, frame.seq, frame.ts, backends)
+            except Exception as e:
+                print(f"[AI] Worker {idx} error: {e}")
+            finally:
+                frame.release()
+            if self.on_result is not None:
+                self.on_result(result)
+            self._complete(frame.seq, result)
+            self.slots.release()
+        self.ai.release_backends(backends)
+
+    def _complete(self, seq, result):
+        # Publish hanya dari kepala antrian agar urutan seq terjaga
+        with self.lock:
+            self.done[seq] = result
+            while self.order and self.order[0] in self.done:
+                res = self.done.pop(self.order.popleft())
+                if res is not None:
+                    self.ai.publish(res)
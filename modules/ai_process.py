@@ -0,0 +1,313 @@
+# modules/ai_process.py
+# AIProcessor di proses terpisah (GIL sendiri): MediaPipe/pyzbar/TFLite yang lama
+# memegang interpreter tidak lagi menahan event loop motor & WebSocket.
+#
+# - Frame: ring slot di multiprocessing.shared_memory (tanpa pickle, 1x memcpy)
+# - Kontrol & hasil: satu multiprocessing.Pipe (hanya tuple kecil & AIResult)
+# - Proses anak dijalankan sebagai `python -m modules.ai_process` (bukan
+#   multiprocessing spawn) agar main.py tidak ikut diimport ulang di anak
+#   (GPIO, kamera & server hanya milik proses utama).
+import os
+import sys
+import time
+import argparse
+import threading
+import subprocess
+import multiprocessing
+from multiprocessing import shared_memory, resource_tracker
+from multiprocessing.connection import Connection
+from collections import deque
+import cv2
+import numpy as np
+from config import FRAME_WIDTH, FRAME_HEIGHT, AI_PROCESS_SLOTS, AI_PROCESS_NICE
+from modules.ai import AIProcessor, MODE_BACKENDS
+from modules.metrics import LATENCY
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class SharedFrameRing:
+    """N slot frame BGR ukuran tetap di satu blok shared memory"""
+    def __init__(self, slots, shape, name=None):
+        self.slots = slots
+        self.shape = tuple(shape)
+        self.nbytes = int(np.prod(self.shape))
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=slots * self.nbytes)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            # Proses anak hanya meminjam: jangan sampai resource_tracker anak
+            # meng-unlink blok milik proses utama saat anak keluar
+            try: resource_tracker.unregister(self.shm._name, "shared_memory")
+            except Exception: pass
+        self.name = self.shm.name
+        self.views = [np.ndarray(self.shape, np.uint8, buffer=self.shm.buf, offset=i * self.nbytes)
+                      for i in range(slots)]
+
+    def write(self, slot, image):
+        view = self.views[slot]
+        if image.shape == self.shape:
+            np.copyto(view, image)
+        else:
+            cv2.resize(image, (self.shape[1], self.shape[0]), dst=view)
+
+    def close(self):
+        self.views = []
+        self.shm.close()
+        if self.owner:
+            try: self.shm.unlink()
+            except FileNotFoundError: pass
+
+
+class AIProcessClient:
+    """
+    Sisi proses utama. API mirip AIWorkerPool (start/stop/submit), hasil
+    dipublish ke AIProcessor utama sehingga ai.current(), overlay & loop
+    kontrol di main.py tidak perlu tahu AI jalan di proses lain.
+    Pengaturan AI (mode, warna, ROI, hybrid, model) ikut dikirim per frame.
+    """
+    workers = 1  # Untuk InferenceScheduler (1 inferensi berjalan sekaligus)
+
+    def __init__(self, ai, slots=AI_PROCESS_SLOTS, on_result=None):
+        self.ai = ai
+        self.on_result = on_result
+        self.ring = SharedFrameRing(slots, (FRAME_HEIGHT, FRAME_WIDTH, 3))
+        self.free = deque(range(slots))
+        self.status = {}          # Status backend di proses anak (cold/warming/hot/unavailable)
+        self.cond = threading.Condition()
+        self.send_lock = threading.Lock()
+        self.conn = None
+        self.proc = None
+        self.alive = False
+        self._thread = None
+        self.sent = 0
+        self.received = 0
+        self.skipped = 0          # Frame dibuang anak (ada frame lebih baru di antrian)
+        self.busy = 0             # submit() ditolak karena semua slot terpakai
+
+    def start(self):
+        parent_conn, child_conn = multiprocessing.Pipe()
+        fd = child_conn.fileno()
+        cmd = [sys.executable, "-m", "modules.ai_process", "--fd", str(fd), "--shm", self.ring.name,
+               "--slots", str(self.ring.slots), "--shape", *map(str, self.ring.shape)]
+        try:
+            self.proc = subprocess.Popen(cmd, cwd=ROOT, pass_fds=(fd,))
+        except Exception as e:
+            print(f"[AI] Gagal menjalankan proses AI: {e}")
+            parent_conn.close()
+            child_conn.close()
+            return False
+        child_conn.close()
+        self.conn = parent_conn
+        self.alive = True
+        # AIProcessor utama tidak memuat model lagi; prefetch/status diteruskan ke anak
+        self.ai.remote = self
+        self._thread = threading.Thread(target=self._result_loop, name="ai-process-rx", daemon=True)
+        self._thread.start()
+        print(f"[AI] Worker process started (pid {self.proc.pid}, {self.ring.slots} slot shm)")
+        if self.ai.mode != "off":
+            self.prefetch(self.ai.mode)
+        return True
+
+    def stop(self):
+        was_alive, self.alive = self.alive, False
+        if was_alive:
+            self._send(None)
+        if self.proc is not None:
+            try: self.proc.wait(timeout=2.0)
+            except subprocess.TimeoutExpired: self.proc.kill()
+        if self.conn is not None:
+            self.conn.close()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+        self._detach()
+        self.ring.close()
+
+    def _detach(self):
+        if self.ai.remote is self:
+            self.ai.remote = None
+
+    def _send(self, msg):
+        try:
+            with self.send_lock:
+                self.conn.send(msg)
+            return True
+        except (OSError, ValueError):
+            return False
+
+    def _settings(self):
+        ai = self.ai
+        return (ai.mode, ai.target_color, ai.roi_tracking, ai.hybrid_tracking,
+                ai.model_name, ai.num_threads, ai.xnnpack)
+
+    def submit(self, frame):
+        """Salin frame ke slot bebas & kirim ke anak. False jika semua slot sibuk."""
+        if not self.alive:
+            return False
+        with self.cond:
+            if not self.free:
+                self.busy += 1
+                return False
+            slot = self.free.popleft()
+        t0 = time.perf_counter()
+        self.ring.write(slot, frame.image)
+        LATENCY.record("ai.shm_write", time.perf_counter() - t0)
+        if not self._send(("frame", slot, frame.seq, frame.ts, self._settings())):
+            self._release(slot)
+            return False
+        self.sent += 1
+        return True
+
+    def prefetch(self, *modes):
+        """Minta anak memuat + warm-up backend mode-mode ini"""
+        if self.alive:
+            self._send(("prefetch", self._settings(), modes))
+
+    def is_ready(self, mode):
+        name = MODE_BACKENDS.get(mode)
+        return name is None or self.status.get(name) in ("hot", "unavailable")
+
+    def wait_ready(self, mode, timeout=None):
+        with self.cond:
+            return self.cond.wait_for(lambda: self.is_ready(mode) or not self.alive, timeout) and self.alive
+
+    def _release(self, slot):
+        with self.cond:
+            self.free.append(slot)
+
+    def _result_loop(self):
+        while True:
+            try:
+                msg = self.conn.recv()
+            except (EOFError, OSError):
+                break
+            kind = msg[0]
+            if kind == "result":
+                _, slot, result = msg
+                self._release(slot)
+                self.received += 1
+                if result is None:
+                    continue
+                LATENCY.record("ai." + result.mode, result.latency)
+                LATENCY.record("ai.ipc", time.monotonic() - result.ts)
+                if self.on_result is not None:
+                    self.on_result(result)
+                self.ai.publish(result)
+            elif kind == "skip":
+                self._release(msg[1])
+                self.skipped += 1
+            elif kind == "status":
+                with self.cond:
+                    self.status = msg[1]
+                    self.cond.notify_all()
+
+        if self.alive:
+            # Anak mati (crash / OOM): kembali ke inferensi in-process
+            print("[AI] Worker process mati, kembali ke inferensi in-process")
+            self.alive = False
+            self._detach()
+            with self.cond:
+                self.cond.notify_all()
+            if self.ai.mode != "off":
+                self.ai.prefetch(self.ai.mode)
+
+    def stats(self):
+        return {
+            "pid": self.proc.pid if self.proc is not None else None,
+            "alive": self.alive,
+            "slots": self.ring.slots,
+            "free_slots": len(self.free),
+            "sent": self.sent,
+            "received": self.received,
+            "skipped": self.skipped,
+            "busy": self.busy,
+            "backends": dict(self.status),
+        }
+
+
+# --- PROSES ANAK ---
+
+def _apply_settings(ai, settings, current):
+    """Samakan AIProcessor anak dengan pengaturan proses utama (hanya yang berubah)"""
+    if settings == current:
+        return current
+    mode, color, roi, hybrid, model, threads, xnnpack = settings
+    old = current or (None,) * 7
+    if (model, threads, xnnpack) != old[4:]:
+        ai.select_model(model, threads, xnnpack)
+    if color != old[1]: ai.set_color_target(color)
+    if roi != old[2]: ai.set_roi_tracking(roi)
+    if hybrid != old[3]: ai.set_hybrid_tracking(hybrid)
+    if mode != old[0]: ai.set_mode(mode)
+    return settings
+
+
+def worker_main(fd, shm_name, slots, shape):
+    try: os.nice(AI_PROCESS_NICE)  # Proses utama (motor/WebSocket) menang saat CPU penuh
+    except Exception: pass
+    conn = Connection(fd)
+    ring = SharedFrameRing(slots, shape, name=shm_name)
+    ai = AIProcessor()
+    settings = None
+    last_status = None
+
+    def send_status():
+        nonlocal last_status
+        status = dict(ai.backends.status)
+        if status != last_status:
+            last_status = status
+            conn.send(("status", status))
+
+    try:
+        send_status()
+        while True:
+            if not conn.poll(0.2):
+                send_status()  # Warm-up di latar selesai walau belum ada frame
+                continue
+            msg = conn.recv()
+            if msg is None:
+                break
+            if msg[0] == "prefetch":
+                settings = _apply_settings(ai, msg[1], settings)
+                ai.prefetch(*msg[2])
+                continue
+
+            # Frame lama yang masih antri dibuang, selalu proses yang terbaru
+            while conn.poll():
+                newer = conn.recv()
+                if newer is None:
+                    conn.send(("skip", msg[1]))
+                    return
+                if newer[0] == "prefetch":
+                    settings = _apply_settings(ai, newer[1], settings)
+                    ai.prefetch(*newer[2])
+                    continue
+                conn.send(("skip", msg[1]))
+                msg = newer
+
+            _, slot, seq, ts, frame_settings = msg
+            settings = _apply_settings(ai, frame_settings, settings)
+            result = None
+            if ai.is_ready(ai.mode):
+                try:
+                    result = ai.analyze(ring.views[slot], seq, ts)
+                except Exception as e:
+                    print(f"[AI] Error inference (process): {e}")
+            conn.send(("result", slot, result))
+            send_status()
+    except (EOFError, OSError, KeyboardInterrupt):
+        pass  # Proses utama keluar
+    finally:
+        ring.close()
+        conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Worker AI (dijalankan oleh AIProcessClient)")
+    parser.add_argument("--fd", type=int, required=True)
+    parser.add_argument("--shm", required=True)
+    parser.add_argument("--slots", type=int, required=True)
+    parser.add_argument("--shape", type=int, nargs=3, required=True)
+    args = parser.parse_args()
+    worker_main(args.fd, args.shm, args.slots, args.shape)
@@ -1,9 +1,174 @@
 import cv2
-import yt_dlp
 import os
 import time
+import threading
+import asyncio
+import itertools
 from config import *
 from modules.ai import AIProcessor
+from modules.ai_pool import AIWorkerPool
+from modules.ai_process import AIProcessClient
+from modules.frame_pool import FramePool
+from modules.scheduler import InferenceScheduler
+from modules.notify import AsyncNotifier
+from modules.metrics import LATENCY
+from modules.loader import lazy_import
+
+
+class Frame:
+    """
+    Satu frame hasil capture + nomor urut & waktu ambil.
+    Jika image milik FramePool: pemegang frame wajib release() setelah selesai
+    (frame dari FrameBuffer.latest()/wait_newer() sudah di-acquire).
+    """
+    __slots__ = ("seq", "ts", "image", "pool", "refs")
+
+    def __init__(self, seq, ts, image, pool=None):
+        self.seq = seq      # Nomor urut monotonic (mulai dari 1)
+        self.ts = ts        # time.monotonic() saat frame diambil
+        self.image = image
+        self.pool = pool
+        self.refs = 1       # Ref awal = milik ring FrameBuffer
+
+    def acquire(self):
+        if self.pool is not None:
+            self.pool.incref(self)
+        return self
+
+    def release(self):
+        if self.pool is not None:
+            self.pool.decref(self)
+
+
+class FrameBuffer:
+    """
+    Ring buffer frame terbaru (thread-safe).
+    Satu producer (thread capture) menulis, banyak viewer membaca.
+    Frame yang dikembalikan latest()/wait_newer() sudah di-acquire: panggil
+    frame.release() setelah selesai agar buffernya bisa dipakai ulang.
+    """
+    def __init__(self, size=FRAME_BUFFER_SIZE):
+        self.size = size
+        self.slots = [None] * size
+        self.seq = 0
+        self.cond = threading.Condition()
+        self.notifier = AsyncNotifier()  # Untuk viewer async (/video_feed)
+
+    def publish(self, image, ts=None, pool=None):
+        with self.cond:
+            self.seq += 1
+            frame = Frame(self.seq, ts if ts is not None else time.monotonic(), image, pool)
+            idx = self.seq % self.size
+            old = self.slots[idx]
+            self.slots[idx] = frame
+            self.cond.notify_all()
+        # Ring melepas frame lama; buffernya kembali ke pool jika tidak ada yang memegang
+        if old is not None:
+            old.release()
+        self.notifier.notify()
+        return frame
+
+    def latest(self):
+        with self.cond:
+            frame = self.slots[self.seq % self.size]
+            return frame.acquire() if frame is not None else None
+
+    def wait_newer(self, last_seq, timeout=1.0):
+        """Blok sampai ada frame dengan seq > last_seq. None jika timeout."""
+        with self.cond:
+            if not self.cond.wait_for(lambda: self.seq > last_seq, timeout):
+                return None
+            return self.slots[self.seq % self.size].acquire()
+
+
+class EncodedFrame:
+    """JPEG siap kirim (bytes immutable, dibagi ke semua viewer)"""
+    __slots__ = ("seq", "ts", "jpeg", "header", "chunk")
+
+    def __init__(self, seq, ts, jpeg):
+        self.seq = seq
+        self.ts = ts
+        self.jpeg = jpeg
+        self.header = (
+            b"--frame\r\n"
+            b"Content-Type: image/jpeg\r\n"
+            b"Content-Length: " + str(len(jpeg)).encode() + b"\r\n\r\n"
+        )
+        # Header + JPEG + penutup digabung sekali saja
+        self.chunk = self.header + jpeg + b"\r\n"
+
+
+# Varian stream: "annotated" (overlay digambar di server) atau
+# "clean" (frame mentah, overlay dirender client dari /ws/telemetry)
+OVERLAY_VARIANTS = ("annotated", "clean")
+
+
+class StreamClient:
+    """Statistik per viewer /video_feed (untuk cek link operator yang lemot)"""
+    _ids = itertools.count(1)
+
+    def __init__(self, addr, overlay="annotated"):
+        self.id = next(self._ids)
+        self.addr = addr
+        self.overlay = overlay
+        self.connected_at = time.time()
+        self.last_seq = 0
+        self.sent = 0       # Frame yang terkirim
+        self.dropped = 0    # Frame yang dilewati karena client tidak sempat
+        self.lag_ms = 0.0   # Umur frame (capture -> selesai kirim) terakhir
+
+    def to_dict(self):
+        uptime = time.time() - self.connected_at
+        return {
+            "id": self.id,
+            "addr": self.addr,
+            "overlay": self.overlay,
+            "uptime_s": round(uptime, 1),
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "fps": round(self.sent / uptime, 1) if uptime > 0 else 0.0,
+            "lag_ms": round(self.lag_ms, 1),
+        }
+
+
+class JpegCache:
+    """
+    Encode-once: tiap seq frame hanya di-encode sekali,
+    viewer lain yang minta seq sama dapat objek bytes yang sama.
+    """
+    def __init__(self, quality=JPEG_QUALITY, on_encode=None):
+        self.params = [int(cv2.IMWRITE_JPEG_QUALITY), quality]
+        self.on_encode = on_encode  # Callback durasi imencode (mis. scheduler.observe_stage)
+        self.latest = None
+        self.lock = threading.Lock()
+        self.encode_count = 0
+
+    def peek(self, seq):
+        """JPEG yang sudah ada untuk seq ini (tanpa encode), atau None"""
+        cached = self.latest
+        if cached is not None and cached.seq >= seq:
+            return cached
+        return None
+
+    def get(self, frame, render=None):
+        """render(image) -> image yang siap di-encode (mis. gambar overlay), None = apa adanya"""
+        with self.lock:
+            cached = self.latest
+            if cached is not None and cached.seq >= frame.seq:
+                return cached
+
+            image = render(frame.image) if render is not None else frame.image
+            t0 = time.perf_counter()
+            ret, buffer = cv2.imencode(".jpg", image, self.params)
+            elapsed = time.perf_counter() - t0
+            LATENCY.record("imencode", elapsed)
+            if self.on_encode is not None:
+                self.on_encode("imencode", elapsed)
+            if not ret:
+                return None
+            self.encode_count += 1
+            self.latest = EncodedFrame(frame.seq, frame.ts, buffer.tobytes())
+            return self.latest
 
 
 class VideoStreamer:
@@ -13,8 +178,24 @@ class VideoStreamer:
         self.is_hardware = isinstance(self.source, int)
         self.frame_count = 0  # Counter untuk frame skipping
 
+        # Buffer bersama: 1 thread capture -> banyak viewer /video_feed
+        self.buffer = FrameBuffer()
+        # Buffer frame dipakai ulang: ring + frame yang sedang dipegang AI/encoder
+        self.pool = FramePool(FRAME_BUFFER_SIZE + FRAME_POOL_EXTRA, (FRAME_HEIGHT, FRAME_WIDTH, 3))
+        self.resize_skipped = 0  # Frame yang sudah berukuran FRAME_WIDTH x FRAME_HEIGHT
+        # Biaya capture & imencode per frame = sinyal kontensi CPU untuk backoff AI
+        self.scheduler = InferenceScheduler(AI_CONTENTION, AI_CPU_BUDGET, AI_MAX_FPS)
+        self.jpeg_caches = {v: JpegCache(on_encode=self.scheduler.observe_stage) for v in OVERLAY_VARIANTS}
+        self.clients = {}  # id -> StreamClient (viewer async yang aktif)
+        self.running = False
+        self._thread = None
+        self._ai_thread = None
+        self._start_lock = threading.Lock()
+
         # Init AI
         self.ai = AIProcessor()
+        self.ai_pool = None  # Dibuat saat start() jika AI_WORKERS > 1
+        self.ai_proc = None  # Dibuat saat start() jika AI_OUT_OF_PROCESS
 
         # Logic Download Simulasi (Jika bukan hardware)
         if not self.is_hardware and ("youtube" in str(self.source)):
@@ -30,6 +211,7 @@ class VideoStreamer:
 
         try:
             print("[CAM] Downloading Simulation Video...")
+            yt_dlp = lazy_import("yt_dlp")  # Hanya untuk simulasi, tidak dimuat saat startup
             with yt_dlp.YoutubeDL(
                 {'outtmpl': path, 'format': 'best[ext=mp4]/best'}
             ) as ydl:
@@ -41,23 +223,77 @@ class VideoStreamer:
     def set_ai_mode(self, mode):
         self.ai.set_mode(mode)
 
-    def generate_frames(self):
-        # --- SETUP CAMERA ---
+    # --- THREAD CAPTURE (PRODUCER TUNGGAL) ---
+    def start(self):
+        """Menyalakan thread capture (aman dipanggil berkali-kali)"""
+        with self._start_lock:
+            if self.running:
+                return
+            self.running = True
+            self._thread = threading.Thread(target=self._capture_loop, name="cam-capture", daemon=True)
+            self._thread.start()
+            if AI_OUT_OF_PROCESS:
+                self.ai_proc = AIProcessClient(self.ai, on_result=self.scheduler.record)
+                if not self.ai_proc.start():
+                    self.ai_proc = None
+            elif AI_WORKERS > 1:
+                self.ai_pool = AIWorkerPool(self.ai, AI_WORKERS, on_result=self.scheduler.record)
+                self.ai_pool.start()
+            self._ai_thread = threading.Thread(target=self._inference_loop, name="ai-worker", daemon=True)
+            self._ai_thread.start()
+            print("[CAM] Capture & AI threads started")
+
+    def stop(self):
+        self.running = False
+        for t in (self._thread, self._ai_thread):
+            if t is not None:
+                t.join(timeout=2.0)
+        self._thread = None
+        self._ai_thread = None
+        if self.ai_pool is not None:
+            self.ai_pool.stop()
+            self.ai_pool = None
+        if self.ai_proc is not None:
+            self.ai_proc.stop()
+            self.ai_proc = None
+
+    def _open_capture(self):
         if self.is_hardware:
             # PENTING: Flag CAP_V4L2 Wajib untuk Raspberry Pi
-            self.cap = cv2.VideoCapture(self.source, cv2.CAP_V4L2)
+            cap = cv2.VideoCapture(self.source, cv2.CAP_V4L2)
 
             # Paksa resolusi rendah agar lancar
-            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, FRAME_WIDTH)
-            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, FRAME_HEIGHT)
-            self.cap.set(cv2.CAP_PROP_FPS, 30)
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, FRAME_WIDTH)
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, FRAME_HEIGHT)
+            cap.set(cv2.CAP_PROP_FPS, 30)
         else:
-            self.cap = cv2.VideoCapture(self.source)
+            cap = cv2.VideoCapture(self.source)
+        return cap
 
-        while True:
-            success, frame = self.cap.read()
+    def _capture_loop(self):
+        self.cap = self._open_capture()
+
+        # Video file dibaca secepat mungkin oleh cv2, jadi dibatasi ke FPS aslinya
+        frame_interval = 0.0
+        if not self.is_hardware:
+            fps = self.cap.get(cv2.CAP_PROP_FPS)
+            frame_interval = 1.0 / fps if fps and fps > 0 else 1.0 / 30
+
+        # Buffer native kamera/video (dipakai ulang) jika ukurannya bukan FRAME_WIDTH x FRAME_HEIGHT
+        raw = None
+
+        while self.running:
+            t_start = time.monotonic()
+            buf = self.pool.get()
+            t0 = time.perf_counter()
+            # Baca langsung ke buffer pool (atau buffer native) tanpa alokasi baru
+            success, frame = self.cap.read(image=raw if raw is not None else buf)
+            ts = time.monotonic()
+            read_time = time.perf_counter() - t0
+            LATENCY.record("cap.read", read_time)
 
             if not success:
+                self.pool.put(buf)
                 # Reconnection Logic
                 if not self.is_hardware:
                     self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
@@ -65,36 +301,207 @@ class VideoStreamer:
                     print("[CAM] Frame drop detected. Reconnecting...")
                     self.cap.release()
                     time.sleep(2)
-                    self.cap = cv2.VideoCapture(self.source, cv2.CAP_V4L2)
-
-                    # Set ulang resolusi setelah reconnect
-                    self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, FRAME_WIDTH)
-                    self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, FRAME_HEIGHT)
+                    self.cap = self._open_capture()
                 continue
 
-            # Resize standard
-            frame = cv2.resize(frame, (FRAME_WIDTH, FRAME_HEIGHT))
+            if frame is not buf:
+                # Ukuran sumber beda: cap.read() mengalokasi array baru, simpan sebagai
+                # buffer native untuk read berikutnya lalu resize ke buffer pool
+                raw = frame
+                t0 = time.perf_counter()
+                cv2.resize(raw, (FRAME_WIDTH, FRAME_HEIGHT), dst=buf)
+                resize_time = time.perf_counter() - t0
+                LATENCY.record("resize", resize_time)
+            else:
+                resize_time = 0.0
+                self.resize_skipped += 1
+            # Biaya CPU capture untuk scheduler. cap.read kamera ikut menunggu frame
+            # berikutnya dari driver (bukan biaya CPU), jadi hanya dihitung untuk file video
+            capture_time = resize_time + (0.0 if self.is_hardware else read_time)
+            if capture_time > 0:
+                self.scheduler.observe_stage("capture", capture_time)
             self.frame_count += 1
 
-            # --- AI PROCESSING STRATEGY ---
-            # Hardware → frame skipping untuk hemat CPU
-            skip_rate = 2 if self.is_hardware else 1
+            # Frame mentah dipublish apa adanya, AI jalan di thread sendiri
+            self.buffer.publish(buf, ts, self.pool)
 
-            if self.frame_count % skip_rate == 0:
-                frame = self.ai.process_frame(frame)
+            if frame_interval:
+                sisa = frame_interval - (time.monotonic() - t_start)
+                if sisa > 0:
+                    time.sleep(sisa)
 
-            # Encode JPEG (Quality 60%)
-            ret, buffer = cv2.imencode(
-                ".jpg",
-                frame,
-                [int(cv2.IMWRITE_JPEG_QUALITY), 60]
-            )
-            if not ret:
+        self.cap.release()
+        self.cap = None
+        print("[CAM] Capture thread stopped")
+
+    # --- THREAD AI (INFERENCE WORKER) ---
+    def _inference_loop(self):
+        """
+        Ambil frame TERBARU dari buffer, jalankan AI, publish hasilnya.
+        Jalan terus walau tidak ada viewer. Kapan infer ditentukan
+        InferenceScheduler; frame yang dilewati memakai hasil terakhir.
+        Mode berat dikirim ke AIWorkerPool (paralel) jika AI_WORKERS > 1.
+        Jika AI_OUT_OF_PROCESS, semua mode dikirim ke proses AI lewat shared memory.
+        """
+        last_seq = 0
+        last_infer_ts = 0.0
+
+        while self.running:
+            frame = self.buffer.wait_newer(last_seq)
+            if frame is None:
+                continue
+            last_seq = frame.seq
+
+            # Frame sudah di-acquire: selalu release agar buffernya kembali ke pool
+            try:
+                mode = self.ai.mode
+                if mode == "off":
+                    continue
+                # Backend mode ini masih dimuat/warm-up di latar: jangan blok thread AI,
+                # lewati frame sampai siap (hasil mode tetap kosong = tidak ada target)
+                if not self.ai.is_ready(mode):
+                    continue
+
+                # Proses AI terpisah (jika mati, otomatis kembali ke jalur in-process)
+                use_proc = self.ai_proc is not None and self.ai_proc.alive
+                # Hybrid & ROI tracking butuh urutan frame (state _tracker/_roi_box dibagi
+                # antar frame), jadi tidak lewat pool yang memproses frame paralel
+                use_pool = (not use_proc and self.ai_pool is not None and mode in AI_POOL_MODES
+                            and not self.ai.hybrid_tracking and not self.ai.roi_tracking)
+                parallel = self.ai_pool.workers if use_pool else 1
+                # Hybrid: jika langkah berikutnya cuma update tracker (murah), jangan dibatasi
+                # AI_MAX_FPS agar posisi target segar tiap frame (juga saat AI di proses lain)
+                last = self.ai.result
+                tracking = self.ai.hybrid_tracking and last.mode == mode and last.tracker_next
+                if not self.scheduler.should_infer(frame, mode, last_infer_ts, parallel, tracking):
+                    # Frame dilewati: loop kontrol tetap dibangunkan per frame
+                    # agar ekstrapolasi current() jalan sesuai frame rate
+                    if AI_EXTRAPOLATE: self.ai.notifier.notify()
+                    continue
+
+                if use_proc:
+                    # Slot penuh = proses AI masih sibuk, frame ini dilewati (bukan diantrikan)
+                    if self.ai_proc.submit(frame):
+                        last_infer_ts = time.monotonic()
+                    continue
+
+                last_infer_ts = time.monotonic()
+                if use_pool:
+                    # Mode berat: lempar ke pool (blok sampai ada worker bebas, worker ikut acquire)
+                    self.ai_pool.submit(frame)
+                else:
+                    try:
+                        result = self.ai.analyze(frame.image, frame.seq, frame.ts)
+                        self.scheduler.record(result)
+                        self.ai.publish(result)
+                    except Exception as e:
+                        print(f"[AI] Error inference: {e}")
+            finally:
+                frame.release()
+
+    # --- VIEWER (CONSUMER) ---
+    def _render(self, image):
+        # Overlay digambar di salinan frame, frame mentah tetap bersih untuk AI
+        t0 = time.perf_counter()
+        out = self.ai.draw_overlay(image.copy(), self.ai.result)
+        LATENCY.record("overlay", time.perf_counter() - t0)
+        return out
+
+    def _cache_for(self, overlay):
+        """
+        Cache JPEG untuk varian ini. Jika tidak ada overlay yang perlu digambar,
+        viewer annotated memakai encode yang sama dengan viewer clean.
+        """
+        if overlay == "clean" or not self.ai.has_overlay(self.ai.result):
+            return self.jpeg_caches["clean"], None
+        return self.jpeg_caches["annotated"], self._render
+
+    def get_jpeg(self, frame, overlay="annotated"):
+        """JPEG (encode-once) untuk frame ini, dipakai bersama semua viewer varian yang sama"""
+        cache, render = self._cache_for(overlay)
+        return cache.get(frame, render)
+
+    def _encode_release(self, frame, overlay):
+        try:
+            return self.get_jpeg(frame, overlay)
+        finally:
+            frame.release()
+
+    def encode_stats(self):
+        return {v: c.encode_count for v, c in self.jpeg_caches.items()}
+
+    def capture_stats(self):
+        """Pemakaian buffer frame (harus datar saat jalan lama) + jumlah GC per generasi"""
+        return {"frames": self.frame_count, "resize_skipped": self.resize_skipped, "pool": self.pool.stats()}
+
+    def generate_frames(self, overlay="annotated"):
+        self.start()
+        last_seq = 0
+
+        while True:
+            frame = self.buffer.wait_newer(last_seq)
+            if frame is None:
                 continue
+            last_seq = frame.seq
+
+            try:
+                encoded = self.get_jpeg(frame, overlay)
+            finally:
+                frame.release()
+            if encoded is None:
+                continue
+
+            yield encoded.chunk
+
+    # --- VIEWER ASYNC (BACKPRESSURE) ---
+    def add_client(self, addr, overlay="annotated"):
+        client = StreamClient(addr, overlay if overlay in OVERLAY_VARIANTS else "annotated")
+        self.clients[client.id] = client
+        print(f"[CAM] Viewer #{client.id} connected ({addr}, {client.overlay})")
+        return client
+
+    def client_stats(self):
+        return [c.to_dict() for c in list(self.clients.values())]
+
+    async def stream_frames(self, client):
+        """
+        Generator async untuk StreamingResponse.
+        Selalu kirim frame TERBARU: kalau client lambat (send masih menunggu),
+        frame di antaranya dilewati, bukan diantrikan.
+        """
+        self.start()
+        event = self.buffer.notifier.subscribe()
+        try:
+            while True:
+                await event.wait()
+                event.clear()
+
+                frame = self.buffer.latest()
+                if frame is None:
+                    continue
+                if frame.seq <= client.last_seq:
+                    frame.release()
+                    continue
+
+                encoded = self._cache_for(client.overlay)[0].peek(frame.seq)
+                if encoded is None:
+                    # Encode di thread agar event loop tidak tertahan. Thread itu yang
+                    # release frame: tetap aman walau client putus saat encode berjalan
+                    encoded = await asyncio.to_thread(self._encode_release, frame, client.overlay)
+                    if encoded is None:
+                        continue
+                else:
+                    frame.release()
+
+                if client.last_seq:
+                    client.dropped += max(0, encoded.seq - client.last_seq - 1)
+                client.last_seq = encoded.seq
+
+                yield encoded.chunk
 
-            yield (
-                b"--frame\r\n"
-                b"Content-Type: image/jpeg\r\n\r\n"
-                + buffer.tobytes()
-                + b"\r\n"
-            )
+                client.sent += 1
+                client.lag_ms = (time.monotonic() - encoded.ts) * 1000.0
+        finally:
+            self.buffer.notifier.unsubscribe(event)
+            self.clients.pop(client.id, None)
+            print(f"[CAM] Viewer #{client.id} disconnected (sent {client.sent}, dropped {client.dropped})")
@@ -0,0 +1,63 @@
+# modules/frame_pool.py
+import gc
+import threading
+import numpy as np
+
+
+class FramePool:
+    """
+    Buffer frame (H, W, 3) uint8 yang dipakai ulang oleh thread capture.
+    Tiap Frame di FrameBuffer memegang satu buffer + refcount: ring buffer
+    memegang 1 ref, tiap consumer (thread AI, worker pool, encoder JPEG)
+    acquire() saat mengambil frame dan release() setelah selesai.
+    Ref terakhir dilepas -> buffer kembali ke pool.
+    Pool kosong (consumer lambat memegang banyak frame) -> alokasi buffer
+    baru, bukan menunggu, jadi thread capture tidak pernah tertahan.
+    """
+    def __init__(self, size, shape):
+        self.shape = tuple(shape)
+        self.free = [np.empty(self.shape, np.uint8) for _ in range(size)]
+        self.allocated = size
+        self.grown = 0       # Alokasi tambahan karena pool kosong
+        self.reused = 0
+        self.lock = threading.Lock()
+
+    def get(self):
+        with self.lock:
+            if self.free:
+                self.reused += 1
+                return self.free.pop()
+            self.allocated += 1
+            self.grown += 1
+        return np.empty(self.shape, np.uint8)
+
+    def put(self, image):
+        with self.lock:
+            self.free.append(image)
+
+    def incref(self, frame):
+        with self.lock:
+            frame.refs += 1
+
+    def decref(self, frame):
+        with self.lock:
+            if frame.refs <= 0:
+                return  # release() ganda: abaikan, buffer sudah kembali
+            frame.refs -= 1
+            if frame.refs:
+                return
+            self.free.append(frame.image)
+
+    def stats(self):
+        with self.lock:
+            free = len(self.free)
+            allocated, grown, reused = self.allocated, self.grown, self.reused
+        return {
+            "allocated": allocated,
+            "free": free,
+            "in_use": allocated - free,
+            "grown": grown,
+            "reused": reused,
+            "mb": round(allocated * int(np.prod(self.shape)) / 1e6, 1),
+            "gc_collections": [s["collections"] for s in gc.get_stats()],
+        }
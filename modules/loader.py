@@ -0,0 +1,60 @@
+# modules/loader.py
+# Import modul berat (mediapipe, tflite, pyzbar, yt_dlp) baru saat dibutuhkan,
+# sekaligus mencatat biaya import vs init untuk laporan startup (GET /startup).
+import time
+import threading
+import importlib
+
+
+class StartupReport:
+    """Rincian waktu startup: fase main.py, import modul lazy, init backend"""
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.phases = []    # (fase, detik sejak t0)
+        self.imports = {}   # nama modul -> detik import
+        self.inits = {}     # nama backend -> detik konstruksi (termasuk import di dalamnya)
+        self._lock = threading.Lock()
+
+    def mark(self, phase):
+        with self._lock:
+            self.phases.append((phase, time.perf_counter() - self.t0))
+
+    def add(self, kind, name, seconds):
+        with self._lock:
+            target = self.imports if kind == "import" else self.inits
+            target[name] = target.get(name, 0.0) + seconds
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "phases_s": {name: round(t, 3) for name, t in self.phases},
+                "imports_s": {name: round(t, 3) for name, t in self.imports.items()},
+                "inits_s": {name: round(t, 3) for name, t in self.inits.items()},
+            }
+
+    def summary(self):
+        d = self.to_dict()
+        phases = " | ".join(f"{k} {v:.2f}s" for k, v in d["phases_s"].items())
+        lazy = ", ".join(f"{k} {v:.2f}s" for k, v in {**d["imports_s"], **d["inits_s"]}.items()) or "-"
+        return f"[STARTUP] {phases} | lazy: {lazy}"
+
+
+STARTUP = StartupReport()
+
+_modules = {}
+_lock = threading.Lock()
+
+
+def lazy_import(name):
+    """importlib.import_module + cache + catat waktunya. ImportError diteruskan."""
+    mod = _modules.get(name)
+    if mod is not None:
+        return mod
+    with _lock:
+        mod = _modules.get(name)
+        if mod is None:
+            t0 = time.perf_counter()
+            mod = importlib.import_module(name)
+            STARTUP.add("import", name, time.perf_counter() - t0)
+            _modules[name] = mod
+    return mod
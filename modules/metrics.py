@@ -0,0 +1,142 @@
+# modules/metrics.py
+import time
+import threading
+from collections import deque
+import numpy as np
+from config import METRICS_ENABLED, METRICS_WINDOW, TRACE_SIZE
+
+
+class SpanStats:
+    """Ring buffer durasi (detik) satu span, percentil dihitung saat diminta"""
+    __slots__ = ("samples", "index", "count", "total", "max", "lock")
+
+    def __init__(self, window):
+        self.samples = [0.0] * window  # list: tulis per sampel lebih murah dari array numpy
+        self.index = 0
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.lock = threading.Lock()
+
+    def add(self, seconds):
+        with self.lock:
+            self.samples[self.index] = seconds
+            self.index = (self.index + 1) % len(self.samples)
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max: self.max = seconds
+
+    def to_dict(self):
+        with self.lock:
+            n = min(self.count, len(self.samples))
+            window = self.samples[:n]
+            count, total, peak = self.count, self.total, self.max
+        if n == 0:
+            return {"count": 0}
+        p50, p95, p99 = np.percentile(window, (50, 95, 99)) * 1000.0
+        return {
+            "count": count,
+            "mean_ms": round(total / count * 1000.0, 3),
+            "p50_ms": round(float(p50), 3),
+            "p95_ms": round(float(p95), 3),
+            "p99_ms": round(float(p99), 3),
+            "max_ms": round(peak * 1000.0, 3),
+        }
+
+
+class LatencyRecorder:
+    """
+    Kumpulan span latensi per tahap pipeline (cap.read, resize, ai.<mode>,
+    overlay, imencode, motor.move, ...). Biaya record() = satu perf_counter
+    di pemanggil + tulis ke ring buffer, jadi aman dinyalakan terus.
+    Window = METRICS_WINDOW sampel terakhir per span.
+    """
+    def __init__(self, window=METRICS_WINDOW, enabled=METRICS_ENABLED):
+        self.window = window
+        self.enabled = enabled
+        self.spans = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds):
+        if not self.enabled:
+            return
+        stats = self.spans.get(name)
+        if stats is None:
+            with self._lock:
+                stats = self.spans.setdefault(name, SpanStats(self.window))
+        stats.add(seconds)
+
+    def span(self, name):
+        """with LATENCY.span("nama"): ... (untuk kode yang bukan hot path)"""
+        return _Span(self, name)
+
+    def stats(self):
+        with self._lock:
+            items = list(self.spans.items())
+        return {name: s.to_dict() for name, s in sorted(items)}
+
+    def reset(self):
+        with self._lock:
+            self.spans = {}
+
+
+class _Span:
+    __slots__ = ("recorder", "name", "t0")
+
+    def __init__(self, recorder, name):
+        self.recorder = recorder
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.recorder.record(self.name, time.perf_counter() - self.t0)
+        return False
+
+
+# Instance global (dipakai camera, ai, motor & endpoint /metrics/latency)
+LATENCY = LatencyRecorder()
+
+
+class ActuationTrace:
+    """
+    Jejak glass-to-motor: untuk tiap frame (seq) yang hasil AI-nya dipakai
+    perintah aktuator (motor / servo), catat capture -> hasil AI -> perintah.
+    Hanya perintah PERTAMA per seq yang dicatat (loop bisa memakai hasil
+    yang sama beberapa kali lewat ekstrapolasi).
+    """
+    def __init__(self, size=TRACE_SIZE, recorder=None):
+        self.entries = deque(maxlen=size)
+        self.recorder = recorder
+        self.last_seq = 0
+        self._lock = threading.Lock()
+
+    def record(self, result, actuator, command, now=None):
+        if result is None or result.seq <= 0 or result.frame_ts <= 0:
+            return
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if result.seq == self.last_seq:
+                return
+            self.last_seq = result.seq
+            self.entries.append((result.seq, result.mode, result.frame_ts, result.ts, now, actuator, command))
+        if self.recorder is not None:
+            self.recorder.record("glass_to_motor", now - result.frame_ts)
+
+    def to_list(self, limit=50):
+        with self._lock:
+            entries = list(self.entries)[-limit:]
+        return [{
+            "seq": seq,
+            "mode": mode,
+            "capture_to_result_ms": round((res_ts - frame_ts) * 1000.0, 2),
+            "result_to_motor_ms": round((motor_ts - res_ts) * 1000.0, 2),
+            "glass_to_motor_ms": round((motor_ts - frame_ts) * 1000.0, 2),
+            "actuator": actuator,
+            "command": command,
+        } for seq, mode, frame_ts, res_ts, motor_ts, actuator, command in entries]
+
+
+TRACE = ActuationTrace(recorder=LATENCY)
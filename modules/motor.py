@@ -1,12 +1,30 @@
 # modules/motor.py
+import time
+import threading
 from config import *
 from gpiozero import Motor
 from modules.config_loader import cfg_mgr # IMPORT BARU
+from modules.metrics import LATENCY, TRACE
 
 class MotorDriver:
     def __init__(self, simulation=False):
         self.simulation = simulation
         self.MIN_PWM = 0.40  
+        self._lock = threading.RLock()  # move/stop bisa dipanggil dari event loop, writer & callback GPIO
+        # Emergency stop (BFD near/clap): selama aktif, gerak MAJU ditolak
+        self.estop_latched = False
+
+        # PWM terakhir yang benar-benar ditulis (untuk skip tulis yang sama)
+        self.pwm_left = 0.0
+        self.pwm_right = 0.0
+        self.writes = 0
+        self.skipped_writes = 0
+
+        # Channel perintah: hanya setpoint TERAKHIR yang disimpan,
+        # ditulis oleh satu thread writer dengan rate tetap (MOTOR_RATE_HZ)
+        self._setpoint = None
+        self._writer = None
+        self._writer_running = False
         
         print(f"[INIT] Motor Driver Start. User Mode: {cfg_mgr.use_user_config}")
         
@@ -44,6 +62,10 @@ class MotorDriver:
     def close(self):
         """Melepas resource GPIO agar bisa dipakai User Define Mode"""
         print("[MOTOR] Closing resources...")
+        self._writer_running = False
+        if self._writer is not None:
+            self._writer.join(timeout=1.0)
+            self._writer = None
         if self.motor_FL: self.motor_FL.close()
         if self.motor_RL: self.motor_RL.close()
         if self.motor_FR: self.motor_FR.close()
@@ -60,7 +82,7 @@ class MotorDriver:
         mapped_val = self.MIN_PWM + (val_abs * (1.0 - self.MIN_PWM))
         return mapped_val * sign
 
-    def move(self, throttle, steering, speed_limit=100):
+    def _compute(self, throttle, steering, speed_limit):
         left_val = throttle + steering
         right_val = throttle - steering
 
@@ -73,23 +95,105 @@ class MotorDriver:
 
         final_left = self._map_speed(left_val)
         final_right = self._map_speed(right_val)
+        return final_left, final_right
+
+    def move(self, throttle, steering, speed_limit=100, result=None):
+        """
+        Tulis langsung (dipakai loop otomatis yang sudah punya rate sendiri).
+        result = AIResult sumber perintah ini, dicatat ke TRACE (glass-to-motor).
+        """
+        t0 = time.perf_counter()
+        final_left, final_right = self._compute(throttle, steering, speed_limit)
+        self._apply(final_left, final_right, speed_limit)
+        LATENCY.record("motor.move", time.perf_counter() - t0)
+        if result is not None:
+            TRACE.record(result, "motor", (self.pwm_left, self.pwm_right))
 
-        if self.simulation:
-            self._visualize(final_left, final_right, speed_limit)
-        else:
-            if self.motor_FL: self.motor_FL.value = final_left
-            if self.motor_RL: self.motor_RL.value = final_left
-            if self.motor_FR: self.motor_FR.value = final_right
-            if self.motor_RR: self.motor_RR.value = final_right
+    def _apply(self, final_left, final_right, speed_limit):
+        # Cek latch & tulis GPIO dalam satu lock: emergency_stop() dari callback GPIO
+        # tidak bisa menyelip di antara cek dan tulis lalu tertimpa gerak maju
+        with self._lock:
+            # Sensor depan terpicu: hanya boleh mundur / putar di tempat
+            if self.estop_latched and (final_left + final_right) > 0:
+                self.stop()
+                return
+            # Nilai PWM sama dengan yang terakhir ditulis -> tidak perlu sentuh GPIO
+            if final_left == self.pwm_left and final_right == self.pwm_right:
+                self.skipped_writes += 1
+                return
+            self.pwm_left = final_left
+            self.pwm_right = final_right
+            self.writes += 1
+            if self.simulation:
+                self._visualize(final_left, final_right, speed_limit)
+            else:
+                if self.motor_FL: self.motor_FL.value = final_left
+                if self.motor_RL: self.motor_RL.value = final_left
+                if self.motor_FR: self.motor_FR.value = final_right
+                if self.motor_RR: self.motor_RR.value = final_right
 
     def stop(self):
-        if self.simulation: 
-            pass
-        else:
-            if self.motor_FL: self.motor_FL.stop()
-            if self.motor_RL: self.motor_RL.stop()
-            if self.motor_FR: self.motor_FR.stop()
-            if self.motor_RR: self.motor_RR.stop()
+        with self._lock:
+            # Buang setpoint yang belum ditulis agar tidak jalan lagi setelah stop
+            self._setpoint = None
+            self.pwm_left = 0.0
+            self.pwm_right = 0.0
+            if self.simulation: 
+                pass
+            else:
+                if self.motor_FL: self.motor_FL.stop()
+                if self.motor_RL: self.motor_RL.stop()
+                if self.motor_FR: self.motor_FR.stop()
+                if self.motor_RR: self.motor_RR.stop()
+
+    # --- CHANNEL PERINTAH (JOYSTICK) ---
+    def command(self, throttle, steering, speed_limit=100):
+        """
+        Simpan setpoint terbaru saja (tidak menulis GPIO).
+        Ratusan pesan joystick per detik digabung, writer menulis max MOTOR_RATE_HZ.
+        """
+        with self._lock:
+            self._setpoint = (throttle, steering, speed_limit)
+        if not self._writer_running:
+            self._start_writer()
+
+    def _start_writer(self):
+        with self._lock:
+            if self._writer_running: return
+            self._writer_running = True
+        self._writer = threading.Thread(target=self._writer_loop, name="motor-writer", daemon=True)
+        self._writer.start()
+
+    def _writer_loop(self):
+        interval = 1.0 / MOTOR_RATE_HZ
+        while self._writer_running:
+            t_start = time.monotonic()
+            # Ambil + tulis dalam satu lock: stop() di tengah tidak bisa "ditimpa"
+            with self._lock:
+                setpoint = self._setpoint
+                self._setpoint = None
+                if setpoint is not None:
+                    self._apply(*self._compute(*setpoint), setpoint[2])
+            sisa = interval - (time.monotonic() - t_start)
+            if sisa > 0: time.sleep(sisa)
+
+    def stats(self):
+        return {
+            "pwm_left": self.pwm_left,
+            "pwm_right": self.pwm_right,
+            "writes": self.writes,
+            "skipped_writes": self.skipped_writes,
+            "estop_latched": self.estop_latched,
+        }
+
+    def emergency_stop(self):
+        """Dipanggil langsung dari callback GPIO (tanpa event loop)"""
+        with self._lock:
+            self.estop_latched = True
+            self.stop()
+
+    def release_estop(self):
+        self.estop_latched = False
 
     def _visualize(self, left, right, limit):
         # ... (Visualisasi sama seperti sebelumnya) ...
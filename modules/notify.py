@@ -0,0 +1,108 @@
+# modules/notify.py
+import asyncio
+import threading
+
+
+class AsyncNotifier:
+    """
+    Jembatan thread -> asyncio.
+    Thread producer (capture, AI, sensor) memanggil notify(),
+    coroutine yang subscribe dibangunkan lewat asyncio.Event miliknya.
+    """
+    def __init__(self):
+        self._waiters = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, event=None):
+        """Daftarkan Event (dibuat baru jika None) di event loop yang sedang jalan"""
+        loop = asyncio.get_running_loop()
+        if event is None:
+            event = asyncio.Event()
+        with self._lock:
+            self._waiters[event] = loop
+        return event
+
+    def unsubscribe(self, event):
+        with self._lock:
+            self._waiters.pop(event, None)
+
+    def notify(self):
+        """Aman dipanggil dari thread manapun"""
+        with self._lock:
+            waiters = list(self._waiters.items())
+        for event, loop in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # Loop sudah ditutup, buang subscriber-nya
+                self.unsubscribe(event)
+
+
+class LoopWaker:
+    """
+    Pengganti pola wait_for(receive_text, timeout) + sleep di loop kontrol.
+    Satu asyncio.Event per koneksi, dibangunkan oleh:
+      - notifier (hasil AI baru, snapshot sensor baru), dan
+      - task pembaca WebSocket (pesan masuk ditaruh di antrian).
+    Loop cukup `messages = await waker.wait()` lalu proses.
+    wait(timeout) memasang satu timer call_later per koneksi yang hanya
+    dipasang ulang saat berbunyi (bukan Task + timer baru tiap bangun),
+    jadi loop dibangunkan paling lambat tiap `timeout` detik.
+    """
+    def __init__(self, websocket, *notifiers):
+        self.websocket = websocket
+        self.notifiers = notifiers
+        self.event = asyncio.Event()
+        self.messages = []
+        self.wakeups = 0
+        self._error = None
+        self._reader = None
+        self._timer = None    # Deadline call_later yang sedang terpasang
+
+    def start(self):
+        for n in self.notifiers:
+            n.subscribe(self.event)
+        self._reader = asyncio.create_task(self._read_loop())
+        return self
+
+    def close(self):
+        for n in self.notifiers:
+            n.unsubscribe(self.event)
+        if self._reader is not None:
+            self._reader.cancel()
+            self._reader = None
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _expire(self):
+        self._timer = None
+        self.event.set()
+
+    async def _read_loop(self):
+        try:
+            while True:
+                self.messages.append(await self.websocket.receive_text())
+                self.event.set()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Disconnect/error diteruskan ke loop lewat wait()
+            self._error = e
+            self.event.set()
+
+    async def wait(self, timeout=None):
+        """
+        Tunggu event berikutnya, kembalikan pesan WS yang masuk (bisa kosong).
+        timeout hanya untuk state machine berbasis waktu, bukan polling.
+        """
+        if timeout is not None and self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(timeout, self._expire)
+        if not self.event.is_set() and self._error is None:
+            await self.event.wait()
+        self.event.clear()
+        self.wakeups += 1
+        if self._error is not None:
+            raise self._error
+        messages, self.messages = self.messages, []
+        return messages
@@ -0,0 +1,91 @@
+# modules/protocol.py
+# Protokol biner ringkas untuk /ws/control (alternatif JSON).
+#
+# Dinegosiasikan per koneksi: client kirim teks JSON
+#   {"cmd": "hello", "proto": "binary"}
+# server balas {"status": "ok", "proto": "binary"}, setelah itu frame BINER
+# diterima (frame teks JSON tetap jalan untuk kompatibilitas).
+#
+# Layout paket (little-endian, byte pertama = opcode):
+#   MOVE   0x01  <BhhB   y*1000, x*1000 (int16), speed 0-100 (uint8)   6 byte
+#   SERVO  0x02  <BBh    servo (0=pan, 1=tilt), sudut (int16)           4 byte
+#   LED    0x03  <BBB    warna (0=r, 1=y, 2=g), state (0/1)             3 byte
+#   BUZZER 0x04  <BB     state (0/1)                                    2 byte
+#   STOP   0x05  <B                                                     1 byte
+import struct
+
+PROTO_JSON = "json"
+PROTO_BINARY = "binary"
+
+OP_MOVE = 0x01
+OP_SERVO = 0x02
+OP_LED = 0x03
+OP_BUZZER = 0x04
+OP_STOP = 0x05
+
+AXIS_SCALE = 1000.0
+
+_MOVE = struct.Struct("<BhhB")
+_SERVO = struct.Struct("<BBh")
+_LED = struct.Struct("<BBB")
+_BUZZER = struct.Struct("<BB")
+_STOP = struct.Struct("<B")
+
+SERVO_NAMES = ("pan", "tilt")
+LED_COLORS = ("r", "y", "g")
+STATES = ("off", "on")
+
+
+class ProtocolError(ValueError):
+    pass
+
+
+def _clamp_axis(v):
+    return max(-32767, min(32767, int(round(v * AXIS_SCALE))))
+
+
+# --- ENCODE (dipakai client / benchmark) ---
+def encode_move(y, x, speed=100):
+    return _MOVE.pack(OP_MOVE, _clamp_axis(y), _clamp_axis(x), max(0, min(255, int(speed))))
+
+def encode_servo(servo, angle):
+    return _SERVO.pack(OP_SERVO, SERVO_NAMES.index(servo), int(angle))
+
+def encode_led(color, state):
+    return _LED.pack(OP_LED, LED_COLORS.index(color), 1 if state in ("on", 1) else 0)
+
+def encode_buzzer(state):
+    return _BUZZER.pack(OP_BUZZER, 1 if state in ("on", 1) else 0)
+
+def encode_stop():
+    return _STOP.pack(OP_STOP)
+
+
+# --- DECODE (server) ---
+def decode(data):
+    """
+    Paket biner -> dict dengan bentuk yang sama seperti payload JSON,
+    jadi dispatch di ws_control tidak perlu dua versi.
+    """
+    if not data:
+        raise ProtocolError("paket kosong")
+    op = data[0]
+    try:
+        if op == OP_MOVE:
+            _, y, x, speed = _MOVE.unpack(data)
+            return {"cmd": "move", "y": y / AXIS_SCALE, "x": x / AXIS_SCALE, "speed": speed}
+        if op == OP_SERVO:
+            _, servo, angle = _SERVO.unpack(data)
+            return {"cmd": "servo", "type": SERVO_NAMES[servo], "angle": angle}
+        if op == OP_LED:
+            _, color, state = _LED.unpack(data)
+            return {"cmd": "led", "color": LED_COLORS[color], "state": STATES[state & 1]}
+        if op == OP_BUZZER:
+            _, state = _BUZZER.unpack(data)
+            return {"cmd": "buzzer", "state": STATES[state & 1]}
+        if op == OP_STOP:
+            _STOP.unpack(data)
+            return {"cmd": "stop"}
+    except (struct.error, IndexError) as e:
+        raise ProtocolError(f"paket opcode {op:#04x} rusak: {e}")
+    raise ProtocolError(f"opcode tidak dikenal: {op:#04x}")
@@ -0,0 +1,139 @@
+# modules/scheduler.py
+import time
+import threading
+
+
+class InferenceScheduler:
+    """
+    Penjadwal adaptif untuk thread AI (pengganti skip_rate tetap).
+
+    - Latensi inferensi diukur per mode (EMA), jadi color (~5 ms) dan
+      SSD (~150 ms) dapat jadwal berbeda.
+    - Interval minimal = latensi / (AI_CPU_BUDGET * jumlah worker).
+      AI_CPU_BUDGET = 1.0 berarti "infer secepat mungkin".
+    - Backoff hanya jika AI benar-benar merebut CPU: biaya rata-rata per
+      frame tahap lain (decode/resize di thread capture, imencode) > biaya
+      tahap yang sama saat AI diam * contention. Makin jarang AI jalan,
+      makin sedikit frame yang melambat, jadi backoff berhenti di titik
+      seimbang (bukan naik terus ke BACKOFF_MAX). Laju kirim ke viewer
+      (link Wi-Fi operator) tidak ikut dihitung, jadi viewer lemot tidak
+      memperlambat AI yang dipakai loop kontrol.
+    - Backoff disesuaikan sekali per WINDOW detik (bukan per frame).
+    - Hybrid tracking: latensi tracker dicatat terpisah ("<mode>.track").
+      Frame yang cukup di-update tracker tidak dibatasi AI_MAX_FPS, jadi
+      posisi target ikut frame rate kamera; batas itu untuk detektor.
+    """
+    ALPHA = 0.2           # Bobot EMA latensi, FPS & biaya tahap
+    WINDOW = 0.5          # Detik antar penyesuaian backoff
+    BACKOFF_UP = 1.25     # Pengali per window saat ada kontensi
+    BACKOFF_DOWN = 0.8    # Pemulihan per window saat CPU aman
+    BACKOFF_MAX = 20.0
+    STAGE_IDLE = 1.0      # Tahap tanpa sampel selama ini (mis. tidak ada viewer) diabaikan
+
+    def __init__(self, contention=1.5, cpu_budget=1.0, max_fps=0):
+        self.contention = contention
+        self.cpu_budget = max(0.05, cpu_budget)
+        self.min_interval = 1.0 / max_fps if max_fps > 0 else 0.0
+        self.latency = {}       # mode -> EMA latensi (detik)
+        self.stages = {}        # tahap -> [EMA biaya saat AI diam, EMA semua frame, waktu sampel]
+        self.source_fps = 0.0   # FPS capture (yang dikirim kamera/video)
+        self.backoff = 1.0
+        self.inferred = 0
+        self.skipped = 0
+        self._last_frame = None  # (seq, ts) untuk hitung FPS capture
+        self._busy_until = 0.0   # Perkiraan selesai inferensi terakhir (monotonic)
+        self._last_adjust = 0.0
+        self._inferred_at_adjust = 0
+        self._lock = threading.Lock()
+
+    def record(self, result):
+        """Catat latensi satu inferensi (dipanggil dari thread AI / worker pool)"""
+        if result is None or result.latency <= 0:
+            return
+        key = result.mode + ".track" if result.tracked else result.mode
+        with self._lock:
+            prev = self.latency.get(key)
+            if prev is None:
+                self.latency[key] = result.latency
+            else:
+                self.latency[key] = prev + self.ALPHA * (result.latency - prev)
+
+    def observe_frame(self, frame):
+        """Ukur FPS capture dari seq & timestamp frame terbaru"""
+        last = self._last_frame
+        self._last_frame = (frame.seq, frame.ts)
+        if last is None or frame.seq <= last[0] or frame.ts <= last[1]:
+            return
+        fps = (frame.seq - last[0]) / (frame.ts - last[1])
+        self.source_fps = fps if not self.source_fps else self.source_fps + self.ALPHA * (fps - self.source_fps)
+
+    def observe_stage(self, name, seconds):
+        """
+        Catat biaya CPU satu tahap non-AI per frame ("capture", "imencode").
+        Sampel saat tidak ada inferensi berjalan juga masuk baseline "diam".
+        """
+        now = time.monotonic()
+        with self._lock:
+            stage = self.stages.setdefault(name, [None, None, now])
+            idxs = (1,) if now < self._busy_until else (0, 1)
+            for i in idxs:
+                prev = stage[i]
+                stage[i] = seconds if prev is None else prev + self.ALPHA * (seconds - prev)
+            stage[2] = now
+
+    def _contended(self, now):
+        with self._lock:
+            return any(now - ts < self.STAGE_IDLE and idle is not None and cost > idle * self.contention
+                       for idle, cost, ts in self.stages.values())
+
+    def _adjust_backoff(self, now):
+        self._last_adjust = now
+        ran = self.inferred > self._inferred_at_adjust
+        self._inferred_at_adjust = self.inferred
+        if ran and self._contended(now):
+            self.backoff = min(self.BACKOFF_MAX, self.backoff * self.BACKOFF_UP)
+        else:
+            self.backoff = max(1.0, self.backoff * self.BACKOFF_DOWN)
+
+    def interval(self, mode, parallel=1, tracking=False):
+        """Jeda minimal antar inferensi untuk mode ini (detik)"""
+        if tracking:
+            base = self.latency.get(mode + ".track", 0.0) / self.cpu_budget
+        else:
+            lat = self.latency.get(mode, 0.0)
+            base = max(self.min_interval, lat / (self.cpu_budget * max(1, parallel)))
+
+        now = time.monotonic()
+        if now - self._last_adjust >= self.WINDOW:
+            self._adjust_backoff(now)
+        return base * self.backoff
+
+    def should_infer(self, frame, mode, last_infer_ts, parallel=1, tracking=False):
+        """
+        True jika frame ini perlu diinferensi, False = pakai hasil lama.
+        tracking=True: langkah berikutnya hanya update tracker (hybrid).
+        """
+        self.observe_frame(frame)
+        now = time.monotonic()
+        if now - last_infer_ts >= self.interval(mode, parallel, tracking):
+            self.inferred += 1
+            key = mode + ".track" if tracking else mode
+            self._busy_until = max(self._busy_until, now + self.latency.get(key, 0.0))
+            return True
+        self.skipped += 1
+        return False
+
+    def stats(self):
+        with self._lock:
+            stages = {name: {"idle_ms": round(idle * 1000, 2) if idle is not None else None,
+                             "ms": round(cost * 1000, 2)}
+                      for name, (idle, cost, _) in self.stages.items()}
+        return {
+            "source_fps": round(self.source_fps, 1),
+            "contention": self.contention,
+            "stages": stages,
+            "backoff": round(self.backoff, 2),
+            "latency_ms": {m: round(v * 1000, 1) for m, v in self.latency.items()},
+            "inferred": self.inferred,
+            "skipped": self.skipped,
+        }
@@ -1,10 +1,37 @@
 # modules/sensors.py
+import time
+import threading
+from collections import namedtuple
 from gpiozero import DistanceSensor, LineSensor, DigitalInputDevice
 from config import *
 from modules.config_loader import cfg_mgr
+from modules.notify import AsyncNotifier
+
+# Snapshot immutable hasil sampling (aman dibaca dari thread/coroutine manapun)
+# lines = (LL, L, M, R, RR), near/clap/panic = True jika terpicu
+SensorSnapshot = namedtuple("SensorSnapshot", ["ts", "distance", "lines", "near", "clap", "panic"])
 
 class SensorManager:
-    def __init__(self):
+    def __init__(self, notifier=None):
+        # Snapshot terbaru + thread sampling (lihat start())
+        self.snapshot = SensorSnapshot(0.0, 999.0, (0, 0, 0, 0, 0), False, False, False)
+        # Notifier bisa dioper dari luar agar subscriber (loop avoid, telemetry)
+        # tetap terhubung walau SensorManager dibuat ulang saat reload hardware
+        self.notifier = notifier if notifier is not None else AsyncNotifier()
+        self.running = False
+        self._thread = None
+        self._dist_thread = None
+        self._distance = 999.0  # Diisi thread jarak (HC-SR04 bisa blok lama jika echo hilang)
+
+        # Emergency stop berbasis interrupt (lihat attach_emergency_stop)
+        self._estop_motor = None
+        self._estop_devices = []
+        self._estop_tripped = set()  # Sensor yang sudah kirim edge terpicu & belum clear
+        self._estop_count = 0
+        self._estop_last_ms = 0.0
+        self._estop_max_ms = 0.0
+        self._estop_total_ms = 0.0
+
         # 1. ULTRASONIC (Tetap Sama)
         trig = cfg_mgr.get_pin("ultrasonic", "trig", PIN_HCSR_TRIG)
         echo = cfg_mgr.get_pin("ultrasonic", "echo", PIN_HCSR_ECHO)
@@ -50,7 +77,126 @@ class SensorManager:
             print(f"[SENSORS] Emergency Sensors Failed (Safe Mode): {e}")
             # Program tetap jalan, tapi sensor ini dianggap tidak ada
 
+    # --- EMERGENCY STOP (EDGE CALLBACK) ---
+    def attach_emergency_stop(self, motor):
+        """
+        Sambungkan near/clap ke callback edge gpiozero yang langsung memanggil
+        motor.emergency_stop(). Jalan di thread GPIO, berlaku di SEMUA mode kontrol.
+        Latch HANYA dari edge terpicu, bukan level saat attach: pin pull-up yang
+        tidak tersambung terbaca "terpicu" dan akan mengunci robot sejak boot.
+        """
+        self._estop_motor = motor
+        self._estop_devices = [dev for dev, on in ((self.bfd_near, ESTOP_NEAR), (self.bfd_clap, ESTOP_CLAP))
+                               if dev is not None and on]
+        for dev in self._estop_devices:
+            # Sama dengan check_panic(): value 0 = terpicu
+            dev.when_deactivated = self._on_panic_edge
+            dev.when_activated = self._on_clear_edge
+
+    def _on_panic_edge(self, device):
+        t0 = time.perf_counter()
+        motor = self._estop_motor
+        if motor is None: return
+        # Jeda edge -> callback (dispatch gpiozero), dari tick pin saat edge terjadi
+        try: edge_s = device.inactive_time or 0.0
+        except Exception: edge_s = 0.0
+        motor.emergency_stop()
+        dt_ms = (time.perf_counter() - t0 + edge_s) * 1000.0
+        self._estop_tripped.add(device)
+
+        self._estop_count += 1
+        self._estop_last_ms = dt_ms
+        self._estop_total_ms += dt_ms
+        self._estop_max_ms = max(self._estop_max_ms, dt_ms)
+        print(f"[SENSORS] EMERGENCY STOP! Edge->stop {dt_ms:.2f} ms (dispatch {edge_s * 1000.0:.2f} ms)")
+
+    def _on_clear_edge(self, device):
+        motor = self._estop_motor
+        # Lepas latch saat semua sensor yang MEMICU sudah clear
+        # (sensor lain yang tidak tersambung terbaca "terpicu" terus, jadi tidak dicek levelnya)
+        self._estop_tripped.discard(device)
+        if motor is not None and not self._estop_tripped and motor.estop_latched:
+            motor.release_estop()
+            print("[SENSORS] Emergency cleared")
+
+    def release_estop(self):
+        """Lepas latch secara manual (operator), walau sensor masih terbaca terpicu"""
+        motor = self._estop_motor
+        self._estop_tripped.clear()
+        if motor is not None and motor.estop_latched:
+            motor.release_estop()
+            print("[SENSORS] Emergency released manually")
+        return self.estop_stats()
+
+    def estop_stats(self):
+        """Latensi edge GPIO -> semua motor berhenti (ms, termasuk dispatch callback gpiozero)"""
+        n = self._estop_count
+        return {
+            "armed": self._estop_motor is not None and bool(self._estop_devices),
+            "latched": bool(self._estop_motor and self._estop_motor.estop_latched),
+            "count": n,
+            "last_ms": round(self._estop_last_ms, 3),
+            "mean_ms": round(self._estop_total_ms / n, 3) if n else 0.0,
+            "max_ms": round(self._estop_max_ms, 3),
+        }
+
+    def start(self, rate_hz=SENSOR_RATE_HZ):
+        """Nyalakan thread sampling (semua mode kontrol baca self.snapshot)"""
+        if self.running: return
+        self.running = True
+        self._thread = threading.Thread(target=self._sample_loop, args=(rate_hz,), name="sensor-sampler", daemon=True)
+        self._thread.start()
+        if self.hcsr:
+            self._dist_thread = threading.Thread(target=self._distance_loop, args=(rate_hz,), name="sensor-distance", daemon=True)
+            self._dist_thread.start()
+        print(f"[SENSORS] Sampling thread started ({rate_hz} Hz)")
+
+    def stop(self):
+        self.running = False
+        for t in (self._thread, self._dist_thread):
+            if t is not None:
+                t.join(timeout=1.0)
+        self._thread = None
+        self._dist_thread = None
+
+    def _distance_loop(self, rate_hz):
+        # Dipisah agar pin digital (line, near, clap) tetap tersampel walau HC-SR04 macet
+        interval = 1.0 / rate_hz
+        while self.running:
+            try:
+                self._distance = self.get_distance()
+            except Exception:
+                pass
+            time.sleep(interval)
+
+    def _sample_loop(self, rate_hz):
+        interval = 1.0 / rate_hz
+        while self.running:
+            t_start = time.monotonic()
+            try:
+                self.snapshot = self.read_snapshot()
+                self.notifier.notify()
+            except Exception as e:
+                print(f"[SENSORS] Sampling error: {e}")
+            sisa = interval - (time.monotonic() - t_start)
+            if sisa > 0: time.sleep(sisa)
+
+    def read_snapshot(self):
+        """Baca semua sensor sekali (langsung ke hardware)"""
+        near = self.bfd_near is not None and self.bfd_near.value == 0
+        clap = self.bfd_clap is not None and self.bfd_clap.value == 0
+        return SensorSnapshot(
+            time.monotonic(),
+            self._distance if self.running else self.get_distance(),
+            tuple(self.get_line_status()),
+            near,
+            clap,
+            near or clap,
+        )
+
     def close(self):
+        self.stop()
+        self._estop_motor = None
         if self.hcsr: self.hcsr.close()
         for s in self.lines.values(): s.close()
         if self.bfd_near: self.bfd_near.close()
@@ -0,0 +1,80 @@
+# modules/telemetry.py
+import time
+import threading
+
+
+class StateRegistry:
+    """
+    Tempat loop kontrol (avoid, tracking, ...) melaporkan state internalnya
+    agar bisa dikirim lewat /ws/telemetry. Cukup set(key, value) tiap iterasi.
+    """
+    def __init__(self):
+        self._state = {}
+        self._lock = threading.Lock()
+
+    def set(self, key, value):
+        with self._lock:
+            self._state[key] = value
+
+    def clear(self, *keys):
+        with self._lock:
+            for k in keys:
+                self._state.pop(k, None)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._state)
+
+
+class DeltaEncoder:
+    """
+    Delta encoding per client: hanya field yang berubah sejak kiriman
+    terakhir yang dikirim. Field yang hilang dikirim sebagai None.
+    Float dibulatkan dulu agar noise kecil tidak dihitung "berubah".
+    Keyframe (snapshot penuh) dikirim pertama kali & tiap keyframe_every detik.
+    """
+    def __init__(self, precision=3, keyframe_every=5.0):
+        self.precision = precision
+        self.keyframe_every = keyframe_every
+        self.last = {}
+        self.last_keyframe = None
+        self.sent = 0
+        self.fields_sent = 0
+        self.fields_skipped = 0
+
+    def _round(self, v):
+        if isinstance(v, float):
+            return round(v, self.precision)
+        if isinstance(v, (list, tuple)):
+            return [self._round(x) for x in v]
+        return v
+
+    def request_keyframe(self):
+        self.last_keyframe = None
+
+    def encode(self, snapshot, now=None):
+        """Kembalikan dict untuk dikirim, atau None jika tidak ada yang berubah"""
+        now = time.monotonic() if now is None else now
+        current = {k: self._round(v) for k, v in snapshot.items()}
+
+        if self.last_keyframe is None or now - self.last_keyframe >= self.keyframe_every:
+            self.last_keyframe = now
+            self.last = current
+            self.sent += 1
+            self.fields_sent += len(current)
+            return {"type": "full", "data": current}
+
+        delta = {k: v for k, v in current.items() if k not in self.last or self.last[k] != v}
+        self.fields_skipped += len(current) - len(delta)
+        for k in self.last:
+            if k not in current:
+                delta[k] = None
+        self.last = current
+        if not delta:
+            return None
+        self.sent += 1
+        self.fields_sent += len(delta)
+        return {"type": "delta", "data": delta}
+
+    def stats(self):
+        return {"sent": self.sent, "fields_sent": self.fields_sent, "fields_skipped": self.fields_skipped}
@@ -0,0 +1,205 @@
+# test/bench_ai.py
+# Replay benchmark AIProcessor: jalankan tiap mode AI di atas video rekaman,
+# headless (tanpa GPIO, tanpa server), lalu simpan hasil ke JSON agar versi
+# lama vs baru bisa dibandingkan di Pi yang sama.
+#
+# Jalankan dari root proyek:
+#   python test/bench_ai.py                                   # semua mode, assets/colour.mp4
+#   python test/bench_ai.py --videos a.mp4 b.mp4 --modes color_detection object_detection
+#   python test/bench_ai.py --out baru.json --compare lama.json
+import os
+import sys
+import gc
+import json
+import time
+import platform
+import argparse
+import resource
+import subprocess
+import tracemalloc
+import cv2
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from config import FRAME_WIDTH, FRAME_HEIGHT
+from modules.ai import AIProcessor, MODE_BACKENDS
+from bench_util import load_frames
+
+MODES = ["color_detection", "face_detection", "gesture_recognition",
+         "qr_recognition", "object_detection", "auto_pilot"]
+
+
+def rss_kb():
+    """RSS saat ini (KB) dari /proc, 0 jika tidak tersedia"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * (os.sysconf("SC_PAGE_SIZE") // 1024)
+    except Exception:
+        return 0
+
+
+def peak_rss_kb():
+    # ru_maxrss: KB di Linux, byte di macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def run_mode(ai, mode, frames, args):
+    ai.set_mode(mode)
+    ai.set_color_target(args.color)
+    ai.set_roi_tracking(args.roi)
+    ai.set_hybrid_tracking(args.hybrid)
+
+    # Backend tidak terpasang (mediapipe/pyzbar/tflite): mode jadi no-op & "FPS"-nya
+    # tidak bermakna, jadi dicatat sebagai unavailable, bukan diukur
+    ai.wait_ready(mode, 60.0)
+    backend = MODE_BACKENDS.get(mode)
+    if backend is not None and ai.backends.status.get(backend) != "hot":
+        return {"mode": mode, "status": "unavailable", "backend": backend}
+
+    seq = 0
+    def step(frame):
+        nonlocal seq
+        seq += 1
+        result = ai.analyze(frame, seq, time.monotonic())
+        ai.publish(result)
+        return result
+
+    # Warm-up (alokasi lazy model/graph tidak ikut dihitung)
+    for f in frames[:args.warmup]:
+        step(f)
+
+    # 1. Throughput & latensi
+    gc.collect()
+    gc_before = sum(s["collections"] for s in gc.get_stats())
+    rss_before = rss_kb()
+    lat = np.empty(len(frames))
+    found = 0
+    t_all = time.perf_counter()
+    for i, f in enumerate(frames):
+        t0 = time.perf_counter()
+        res = step(f)
+        lat[i] = time.perf_counter() - t0
+        found += bool(res.object_found or res.gesture is not None or res.qr_data)
+    total = time.perf_counter() - t_all
+    gc_runs = sum(s["collections"] for s in gc.get_stats()) - gc_before
+
+    # 2. Alokasi per frame (tracemalloc memperlambat, jadi pass terpisah & sebagian frame)
+    tracemalloc.start()
+    blocks, peaks = [], []
+    for f in frames[:args.alloc_frames]:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        res = step(f)
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+        blocks.append(sum(max(0, st.count_diff) for st in after.compare_to(before, "traceback")))
+        peaks.append(peak - base)
+        del res
+    tracemalloc.stop()
+
+    lat_ms = lat * 1000.0
+    return {
+        "mode": mode,
+        "status": "ok",
+        "frames": len(frames),
+        "fps": round(len(frames) / total, 2),
+        "mean_ms": round(float(lat_ms.mean()), 3),
+        "p50_ms": round(float(np.percentile(lat_ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(lat_ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(lat_ms, 99)), 3),
+        "max_ms": round(float(lat_ms.max()), 3),
+        "hit_rate": round(found / len(frames), 3),
+        "alloc_blocks_per_frame": round(float(np.mean(blocks)), 1) if blocks else None,
+        "alloc_peak_kb_per_frame": round(float(np.mean(peaks)) / 1024.0, 1) if peaks else None,
+        "gc_collections": gc_runs,
+        "rss_growth_kb": rss_kb() - rss_before,
+        "peak_rss_kb": peak_rss_kb(),
+    }
+
+
+def metadata():
+    try:
+        rev = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                      stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        rev = "unknown"
+    return {
+        "git": rev,
+        "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "host": platform.node(),
+        "machine": platform.machine(),
+        "python": platform.python_version(),
+        "opencv": cv2.__version__,
+        "numpy": np.__version__,
+        "frame_size": [FRAME_WIDTH, FRAME_HEIGHT],
+    }
+
+
+def compare(old_path, new, tolerance):
+    with open(old_path) as f:
+        old = json.load(f)
+    old_map = {(r["video"], r["mode"]): r for r in old["results"]}
+    print(f"\n[BENCH] Banding dengan {old_path} (git {old['meta'].get('git')})")
+    for r in new["results"]:
+        o = old_map.get((r["video"], r["mode"]))
+        if o is None:
+            continue
+        if r.get("status") == "unavailable" or o.get("status") == "unavailable":
+            print(f"  {os.path.basename(r['video']):16} {r['mode']:20} dilewati (backend tidak tersedia di salah satu run)")
+            continue
+        d_fps = (r["fps"] - o["fps"]) / o["fps"] * 100.0 if o["fps"] else 0.0
+        d_p95 = (r["p95_ms"] - o["p95_ms"]) / o["p95_ms"] * 100.0 if o["p95_ms"] else 0.0
+        flag = "  <-- REGRESI" if d_fps < -tolerance else ""
+        print(f"  {os.path.basename(r['video']):16} {r['mode']:20} fps {o['fps']:7.1f} -> {r['fps']:7.1f} ({d_fps:+5.1f}%) | "
+              f"p95 {o['p95_ms']:7.2f} -> {r['p95_ms']:7.2f} ms ({d_p95:+5.1f}%){flag}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay benchmark semua mode AIProcessor")
+    parser.add_argument("--videos", nargs="+", default=[os.path.join(ROOT, "assets", "colour.mp4")])
+    parser.add_argument("--modes", nargs="+", default=MODES, choices=MODES)
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--alloc-frames", type=int, default=30)
+    parser.add_argument("--color", default="all", help="Target color_detection")
+    parser.add_argument("--roi", action="store_true", help="Aktifkan ROI tracking")
+    parser.add_argument("--hybrid", action="store_true", help="Aktifkan hybrid detect-then-track")
+    parser.add_argument("--out", default=None, help="File JSON hasil (default bench_ai_<git>_<waktu>.json)")
+    parser.add_argument("--compare", default=None, help="JSON hasil lama untuk dibandingkan")
+    parser.add_argument("--tolerance", type=float, default=5.0, help="Batas penurunan FPS (%%) sebelum ditandai regresi")
+    args = parser.parse_args()
+
+    meta = metadata()
+    meta["options"] = {"color": args.color, "roi": args.roi, "hybrid": args.hybrid, "frames": args.frames}
+    report = {"meta": meta, "results": []}
+
+    ai = AIProcessor()
+    for video in args.videos:
+        # Beberapa video dibandingkan per nama: video rusak dilewati, bukan diganti frame acak
+        frames = load_frames(video, args.frames, random_fallback=False)
+        if not frames:
+            print(f"[BENCH] Video {video} tidak terbaca, dilewati")
+            continue
+        print(f"[BENCH] {video}: {len(frames)} frame {FRAME_WIDTH}x{FRAME_HEIGHT}")
+        for mode in args.modes:
+            res = run_mode(ai, mode, frames, args)
+            res["video"] = video
+            report["results"].append(res)
+            if res["status"] == "unavailable":
+                print(f"  [{mode:20}] backend {res['backend']} tidak tersedia, dilewati")
+                continue
+            print(f"  [{mode:20}] {res['fps']:7.1f} fps | p50 {res['p50_ms']:7.2f} | p95 {res['p95_ms']:7.2f} | "
+                  f"p99 {res['p99_ms']:7.2f} ms | hit {res['hit_rate']:.2f} | blok/frame {res['alloc_blocks_per_frame']} | "
+                  f"peak RSS {res['peak_rss_kb'] / 1024.0:.0f} MB")
+    ai.set_mode("off")
+
+    out = args.out or f"bench_ai_{meta['git']}_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"[BENCH] Hasil disimpan ke {out}")
+
+    if args.compare:
+        compare(args.compare, report, args.tolerance)
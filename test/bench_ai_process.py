@@ -0,0 +1,92 @@
+# test/bench_ai_process.py
+# Jitter tick loop kontrol (asyncio, seperti loop motor di main.py) saat AI berat jalan:
+#   inproc  = AIProcessor di thread proses yang sama (berebut GIL)
+#   process = AIProcessClient, AI di proses terpisah lewat shared memory
+#
+# Jalankan dari root proyek:  python test/bench_ai_process.py [--mode object_detection] [--seconds 10]
+import os
+import sys
+import time
+import asyncio
+import argparse
+import threading
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+from modules.ai import AIProcessor
+from modules.ai_process import AIProcessClient
+from modules.camera import Frame
+from bench_util import load_frames
+
+
+async def control_loop(seconds, tick):
+    """Loop tetap `tick` detik; catat keterlambatan tiap bangun (ms)"""
+    late = []
+    deadline = time.monotonic() + seconds
+    next_t = time.monotonic() + tick
+    while next_t < deadline:
+        await asyncio.sleep(max(0.0, next_t - time.monotonic()))
+        late.append((time.monotonic() - next_t) * 1000.0)
+        next_t += tick
+    return np.array(late)
+
+
+def run(kind, mode, frames, seconds, tick, fps):
+    ai = AIProcessor()
+    client = None
+    if kind == "process":
+        client = AIProcessClient(ai)
+        client.start()
+    ai.set_mode(mode)
+    ai.wait_ready(mode, 60.0)
+
+    running = True
+    inferred = [0]
+    def feeder():
+        seq = 0
+        while running:
+            seq += 1
+            frame = Frame(seq, time.monotonic(), frames[seq % len(frames)])
+            if client is not None:
+                client.submit(frame)
+            else:
+                ai.publish(ai.analyze(frame.image, frame.seq, frame.ts))
+            inferred[0] += 1
+            time.sleep(1.0 / fps)
+    t = threading.Thread(target=feeder, daemon=True)
+    t.start()
+
+    late = asyncio.run(control_loop(seconds, tick))
+    running = False
+    t.join(timeout=5.0)
+    results = ai.result.seq
+    if client is not None:
+        client.stop()
+    return {
+        "kind": kind,
+        "ticks": len(late),
+        "p50_ms": round(float(np.percentile(late, 50)), 2),
+        "p99_ms": round(float(np.percentile(late, 99)), 2),
+        "max_ms": round(float(late.max()), 2),
+        "over_tick": int((late > tick * 1000.0).sum()),
+        "last_result_seq": results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Jitter loop kontrol: AI in-process vs proses terpisah")
+    parser.add_argument("--mode", default="object_detection")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--tick", type=float, default=0.02, help="Periode loop kontrol (detik)")
+    parser.add_argument("--fps", type=float, default=30.0, help="Laju frame masuk")
+    parser.add_argument("--video", default="assets/colour.mp4")
+    args = parser.parse_args()
+
+    frames = load_frames(args.video, 60)
+    print(f"[BENCH] mode {args.mode}, tick {args.tick * 1000:.0f} ms, {args.seconds:.0f} s, CPU {os.cpu_count()} core")
+    for kind in ("inproc", "process"):
+        r = run(kind, args.mode, frames, args.seconds, args.tick, args.fps)
+        print(f"  {kind:8} | telat p50 {r['p50_ms']:6.2f} | p99 {r['p99_ms']:7.2f} | max {r['max_ms']:7.2f} ms | "
+              f"tick > periode: {r['over_tick']}/{r['ticks']} | seq hasil terakhir {r['last_result_seq']}")
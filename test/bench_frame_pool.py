@@ -0,0 +1,89 @@
+# test/bench_frame_pool.py
+# Alokasi per frame di jalur capture: lama (cap.read() + cv2.resize baru tiap frame)
+# vs FramePool (cap.read(image=buf) + resize ke buffer pool / resize dilewati).
+#
+# Jalankan dari root proyek:  python test/bench_frame_pool.py [--video assets/colour.mp4] [--frames 300]
+# Coba juga video 640x480 untuk melihat jalur tanpa resize.
+import os
+import sys
+import gc
+import time
+import argparse
+import tracemalloc
+import cv2
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from config import FRAME_WIDTH, FRAME_HEIGHT, FRAME_BUFFER_SIZE, FRAME_POOL_EXTRA
+from modules.camera import FrameBuffer
+from modules.frame_pool import FramePool
+
+
+def legacy_step(cap, buffer, state):
+    ok, frame = cap.read()
+    if not ok:
+        return False
+    frame = cv2.resize(frame, (FRAME_WIDTH, FRAME_HEIGHT))
+    buffer.publish(frame)
+    return True
+
+
+def pooled_step(cap, buffer, state):
+    pool = state["pool"]
+    buf = pool.get()
+    ok, frame = cap.read(image=state["raw"] if state["raw"] is not None else buf)
+    if not ok:
+        pool.put(buf)
+        return False
+    if frame is not buf:
+        state["raw"] = frame
+        cv2.resize(frame, (FRAME_WIDTH, FRAME_HEIGHT), dst=buf)
+    buffer.publish(buf, pool=pool)
+    return True
+
+
+def run(name, step, video, frames):
+    cap = cv2.VideoCapture(video)
+    buffer = FrameBuffer()
+    state = {"pool": FramePool(FRAME_BUFFER_SIZE + FRAME_POOL_EXTRA, (FRAME_HEIGHT, FRAME_WIDTH, 3)), "raw": None}
+    for _ in range(10):  # Warm-up: buffer native & pool terisi
+        step(cap, buffer, state)
+
+    gc.collect()
+    gc_before = [s["collections"] for s in gc.get_stats()]
+    tracemalloc.start()
+    peaks = []
+    n = 0
+    t0 = time.perf_counter()
+    while n < frames:
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        if not step(cap, buffer, state):
+            cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            continue
+        peaks.append(tracemalloc.get_traced_memory()[1] - base)
+        n += 1
+    elapsed = time.perf_counter() - t0
+    tracemalloc.stop()
+    gc_after = [s["collections"] for s in gc.get_stats()]
+    cap.release()
+
+    peaks_kb = np.array(peaks) / 1024.0
+    print(f"  {name:7} | {n / elapsed:6.1f} fps | alokasi/frame mean {peaks_kb.mean():8.1f} KB, "
+          f"max {peaks_kb.max():8.1f} KB | GC {[a - b for a, b in zip(gc_after, gc_before)]}"
+          + (f" | pool {state['pool'].stats()['allocated']} buffer" if name == "pool" else ""))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Alokasi jalur capture: lama vs FramePool")
+    parser.add_argument("--video", default=os.path.join(ROOT, "assets", "colour.mp4"))
+    parser.add_argument("--frames", type=int, default=300)
+    args = parser.parse_args()
+
+    cap = cv2.VideoCapture(args.video)
+    w, h = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    cap.release()
+    print(f"[BENCH] {args.video}: {w}x{h} -> {FRAME_WIDTH}x{FRAME_HEIGHT}, {args.frames} frame")
+    run("legacy", legacy_step, args.video, args.frames)
+    run("pool", pooled_step, args.video, args.frames)
@@ -0,0 +1,93 @@
+# test/bench_protocol.py
+# Benchmark protokol kontrol /ws/control: JSON (json.dumps/json.loads)
+# vs biner (modules/protocol.py, struct).
+#
+# Mode 1 (default, tanpa server): ukur encode + decode per pesan di proses ini.
+# Mode 2 (--url ws://robot:8000/ws/control): kirim pesan ke server asli lewat
+#   WebSocket (butuh paket `websockets`), ukur pesan/detik dari sisi client.
+#   Hanya paket gerak nol (y=0, x=0, speed=0): motor robot tidak ikut bergerak.
+#
+# Jalankan dari root proyek:  python test/bench_protocol.py [--count 100000] [--url ...]
+import os
+import sys
+import json
+import time
+import argparse
+import asyncio
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modules import protocol
+
+
+def sample_moves(count):
+    rng = np.random.default_rng(0)
+    ys = rng.uniform(-1, 1, count).round(3)
+    xs = rng.uniform(-1, 1, count).round(3)
+    return [(float(y), float(x), 80) for y, x in zip(ys, xs)]
+
+
+def bench_local(name, encode, decode, moves):
+    # Ukuran pesan
+    size = np.mean([len(encode(*m)) for m in moves[:1000]])
+
+    lat = np.empty(len(moves))
+    t_all = time.perf_counter()
+    for i, m in enumerate(moves):
+        t0 = time.perf_counter()
+        payload = decode(encode(*m))
+        float(payload.get("y", 0)); float(payload.get("x", 0))
+        lat[i] = time.perf_counter() - t0
+    total = time.perf_counter() - t_all
+
+    lat_us = lat * 1e6
+    res = {
+        "name": name,
+        "msg_per_s": round(len(moves) / total),
+        "mean_us": round(float(lat_us.mean()), 2),
+        "p50_us": round(float(np.percentile(lat_us, 50)), 2),
+        "p99_us": round(float(np.percentile(lat_us, 99)), 2),
+        "bytes": round(float(size), 1),
+    }
+    print(f"[{name:6}] {res['msg_per_s']:>9} msg/s | mean {res['mean_us']:6.2f} us | "
+          f"p50 {res['p50_us']:6.2f} | p99 {res['p99_us']:6.2f} | {res['bytes']:5.1f} byte/pesan")
+    return res
+
+
+def json_encode(y, x, speed):
+    return json.dumps({"cmd": "move", "y": y, "x": x, "speed": speed})
+
+
+async def bench_remote(url, count):
+    import websockets
+    # Setpoint nol: ukur throughput protokol tanpa menggerakkan motor robot asli
+    moves = [(0.0, 0.0, 0)] * count
+    for proto in (protocol.PROTO_JSON, protocol.PROTO_BINARY):
+        async with websockets.connect(url) as ws:
+            await ws.send(json.dumps({"cmd": "hello", "proto": proto}))
+            print(f"[BENCH] Server: {await ws.recv()}")
+            encode = protocol.encode_move if proto == protocol.PROTO_BINARY else json_encode
+            t0 = time.perf_counter()
+            for m in moves:
+                await ws.send(encode(*m))
+            await ws.send(json.dumps({"cmd": "stop"}))
+            total = time.perf_counter() - t0
+            print(f"[{proto:6}] {len(moves) / total:9.0f} msg/s terkirim ({len(moves)} pesan)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark protokol kontrol JSON vs biner")
+    parser.add_argument("--count", type=int, default=100000)
+    parser.add_argument("--url", default=None, help="ws://host:port/ws/control (opsional)")
+    args = parser.parse_args()
+
+    if args.url:
+        asyncio.run(bench_remote(args.url, args.count))
+        sys.exit(0)
+
+    moves = sample_moves(args.count)
+
+    js = bench_local("json", json_encode, json.loads, moves)
+    bn = bench_local("binary", protocol.encode_move, protocol.decode, moves)
+    print(f"[BENCH] Speedup biner: {bn['msg_per_s'] / js['msg_per_s']:.2f}x, "
+          f"ukuran {js['bytes'] / bn['bytes']:.1f}x lebih kecil")
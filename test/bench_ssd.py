@@ -0,0 +1,111 @@
+# test/bench_ssd.py
+# Microbenchmark preprocessing + postprocessing SSD MobileNet:
+# versi lama (resize -> cvtColor -> expand_dims -> set_tensor, loop skor)
+# vs versi baru (buffer prealokasi + tensor() view + filter vektor).
+#
+# Jalankan dari root proyek:  python test/bench_ssd.py [--frames 200] [--video assets/colour.mp4]
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from modules.ai import AIProcessor
+from bench_util import load_frames
+
+
+def legacy_ssd(ai, be, frame):
+    """Salinan implementasi lama (_process_ssd_mobilenet sebelum optimasi)"""
+    h_img, w_img, _ = frame.shape
+    frame_resized = cv2.resize(frame, (300, 300))
+    input_data = np.expand_dims(cv2.cvtColor(frame_resized, cv2.COLOR_BGR2RGB), axis=0)
+    be.interpreter.set_tensor(be.input_details[0]['index'], input_data)
+    be.interpreter.invoke()
+    boxes = be.interpreter.get_tensor(be.output_details[0]['index'])[0]
+    classes = be.interpreter.get_tensor(be.output_details[1]['index'])[0]
+    scores = be.interpreter.get_tensor(be.output_details[2]['index'])[0]
+    found = []
+    for i in range(len(scores)):
+        if scores[i] > 0.5:
+            label = ai.labels.get(int(classes[i]), "unknown")
+            if label in ai.TARGET_OBJECTS:
+                ymin, xmin, ymax, xmax = boxes[i]
+                x, y = int(xmin * w_img), int(ymin * h_img)
+                w, h = int((xmax - xmin) * w_img), int((ymax - ymin) * h_img)
+                found.append((label, float(scores[i]), (x, y, w, h)))
+    return found
+
+
+def optimized_ssd(ai, be, frame):
+    h_img, w_img, _ = frame.shape
+    boxes, classes, scores = be.run_ssd(frame)
+    return ai.filter_ssd(boxes, classes, scores, w_img, h_img)
+
+
+def run(name, fn, ai, be, frames):
+    # Warm-up (alokasi lazy interpreter tidak ikut dihitung)
+    for f in frames[:5]:
+        fn(ai, be, f)
+
+    # 1. Latensi (tanpa tracemalloc agar tidak terdistorsi)
+    lat = []
+    for f in frames:
+        t0 = time.perf_counter()
+        fn(ai, be, f)
+        lat.append((time.perf_counter() - t0) * 1000.0)
+
+    # 2. Alokasi per frame (jumlah blok baru & puncak byte, diukur tracemalloc)
+    tracemalloc.start()
+    blocks = []
+    peaks = []
+    for f in frames:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        out = fn(ai, be, f)
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+        blocks.append(sum(max(0, st.count_diff) for st in after.compare_to(before, "traceback")))
+        peaks.append(peak - base)
+        del out
+    tracemalloc.stop()
+
+    lat = np.array(lat)
+    res = {
+        "name": name,
+        "mean_ms": round(float(lat.mean()), 3),
+        "p50_ms": round(float(np.percentile(lat, 50)), 3),
+        "p95_ms": round(float(np.percentile(lat, 95)), 3),
+        "alloc_blocks_per_frame": round(float(np.mean(blocks)), 1),
+        "alloc_peak_kb_per_frame": round(float(np.mean(peaks)) / 1024.0, 1),
+    }
+    print(f"[{name:9}] mean {res['mean_ms']:7.3f} ms | p50 {res['p50_ms']:7.3f} | p95 {res['p95_ms']:7.3f} | "
+          f"blok baru/frame {res['alloc_blocks_per_frame']:6.1f} | puncak alokasi/frame {res['alloc_peak_kb_per_frame']:8.1f} KB")
+    return res
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark preprocessing SSD MobileNet")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--video", default="assets/colour.mp4")
+    args = parser.parse_args()
+
+    ai = AIProcessor()
+    be = ai.backends
+    if not be.interpreter:
+        print(f"[BENCH] Model {ai.model_path} tidak bisa dimuat (tflite tidak terpasang?)")
+        sys.exit(1)
+
+    frames = load_frames(args.video, args.frames)
+    print(f"[BENCH] {len(frames)} frame, model {ai.model_path}")
+
+    old = run("lama", legacy_ssd, ai, be, frames)
+    new = run("baru", optimized_ssd, ai, be, frames)
+
+    # Pastikan hasil deteksi sama
+    same = all(legacy_ssd(ai, be, f) == optimized_ssd(ai, be, f) for f in frames[:20])
+    print(f"[BENCH] Hasil deteksi identik: {same}")
+    print(f"[BENCH] Speedup: {old['mean_ms'] / new['mean_ms']:.2f}x")
@@ -0,0 +1,99 @@
+# test/bench_tflite.py
+# Pilih konfigurasi TFLite tercepat untuk object detection di CPU ini:
+# semua varian model di TFLITE_MODELS (yang file-nya ada) x jumlah thread x XNNPACK on/off.
+# Hasil terbaik dicetak sebagai baris config.py yang tinggal disalin.
+#
+# Jalankan dari root proyek:  python test/bench_tflite.py [--frames 50] [--threads 1 2 4] [--out hasil.json]
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)  # Path model di config relatif ke root proyek
+from config import TFLITE_MODELS, FRAME_WIDTH, FRAME_HEIGHT
+from modules.ai import AIBackends, AIProcessor
+from bench_util import load_frames
+
+
+def run_config(ai, name, path, threads, xnnpack, frames):
+    be = AIBackends(path, threads, xnnpack)
+    t0 = time.perf_counter()
+    be.ensure("object_detection")  # Load + warm-up
+    load_s = time.perf_counter() - t0
+    if be.interpreter is None:
+        return None
+
+    lat = np.empty(len(frames))
+    detections = 0
+    for i, f in enumerate(frames):
+        t = time.perf_counter()
+        boxes, classes, scores = be.run_ssd(f)
+        found = ai.filter_ssd(boxes, classes, scores, FRAME_WIDTH, FRAME_HEIGHT)
+        del boxes, classes, scores  # View output tidak boleh dipegang saat invoke() berikutnya
+        lat[i] = time.perf_counter() - t
+        detections += len(found)
+
+    lat_ms = lat * 1000.0
+    return {
+        "model": name,
+        "threads": threads,
+        "xnnpack": xnnpack,
+        "input": str(be.input_details[0]["dtype"].__name__),
+        "load_s": round(load_s, 3),
+        "fps": round(1000.0 / float(lat_ms.mean()), 2),
+        "mean_ms": round(float(lat_ms.mean()), 2),
+        "p50_ms": round(float(np.percentile(lat_ms, 50)), 2),
+        "p95_ms": round(float(np.percentile(lat_ms, 95)), 2),
+        "detections_per_frame": round(detections / len(frames), 2),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark varian model & engine TFLite")
+    parser.add_argument("--frames", type=int, default=50)
+    parser.add_argument("--video", default="assets/colour.mp4")
+    parser.add_argument("--threads", type=int, nargs="+", default=sorted({1, 2, os.cpu_count() or 4}))
+    parser.add_argument("--models", nargs="+", default=list(TFLITE_MODELS))
+    parser.add_argument("--out", default=None, help="Simpan semua hasil ke JSON")
+    args = parser.parse_args()
+
+    ai = AIProcessor()  # Hanya untuk filter_ssd (label & threshold sama dengan produksi)
+    frames = load_frames(args.video, args.frames)
+    print(f"[BENCH] {len(frames)} frame, CPU {os.cpu_count()} core")
+
+    results = []
+    for name in args.models:
+        path = TFLITE_MODELS.get(name)
+        if not path or not os.path.exists(path):
+            print(f"[BENCH] {name}: file {path} tidak ada, dilewati")
+            continue
+        for threads in args.threads:
+            for xnnpack in (True, False):
+                res = run_config(ai, name, path, threads, xnnpack, frames)
+                if res is None:
+                    print(f"[BENCH] {name} gagal dimuat (tflite tidak terpasang?)")
+                    break
+                results.append(res)
+                print(f"  {name:24} thr {threads} xnn {'on ' if xnnpack else 'off'} | {res['fps']:6.2f} fps | "
+                      f"mean {res['mean_ms']:7.2f} | p95 {res['p95_ms']:7.2f} ms | deteksi/frame {res['detections_per_frame']}")
+
+    if not results:
+        sys.exit(1)
+
+    best = max(results, key=lambda r: r["fps"])
+    base = next((r for r in results if r["threads"] == 1 and r["xnnpack"]), results[0])
+    print(f"\n[BENCH] Tercepat: {best['model']} thr {best['threads']} xnnpack {best['xnnpack']} "
+          f"({best['fps']} fps, {best['fps'] / base['fps']:.2f}x vs {base['model']} 1 thread)")
+    print("[BENCH] Salin ke config.py:")
+    print(f'TFLITE_MODEL = "{best["model"]}"')
+    print(f"TFLITE_NUM_THREADS = {best['threads']}")
+    print(f"TFLITE_XNNPACK = {best['xnnpack']}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"cpu_count": os.cpu_count(), "best": best, "results": results}, f, indent=2)
+        print(f"[BENCH] Hasil disimpan ke {args.out}")
@@ -0,0 +1,33 @@
+# test/bench_util.py
+# Helper bersama untuk script test/bench_*.py (diimport dari folder test/).
+import os
+import sys
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import FRAME_WIDTH, FRAME_HEIGHT
+
+
+def load_frames(path, count, random_fallback=True):
+    """
+    Decode video SEKALI di depan (diulang dari awal jika kurang dari `count`)
+    agar waktu decode tidak ikut terukur. Video tidak terbaca -> frame acak,
+    atau list kosong jika random_fallback=False.
+    """
+    frames = []
+    cap = cv2.VideoCapture(path)
+    while len(frames) < count:
+        ok, frame = cap.read()
+        if not ok:
+            if not frames:
+                break
+            cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            continue
+        frames.append(cv2.resize(frame, (FRAME_WIDTH, FRAME_HEIGHT)))
+    cap.release()
+    if not frames and random_fallback:
+        print(f"[BENCH] Video {path} tidak terbaca, pakai frame acak")
+        rng = np.random.default_rng(0)
+        frames = [rng.integers(0, 255, (FRAME_HEIGHT, FRAME_WIDTH, 3), np.uint8) for _ in range(count)]
+    return frames